@@ -0,0 +1,150 @@
+import json
+import multiprocessing
+import sys
+
+import degrees
+
+USAGE = "Usage: python batch.py [--compact] [--workers N] directory [pairs]"
+
+
+def main():
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    workers = 1
+    if "--workers" in args:
+        i = args.index("--workers")
+        try:
+            workers = int(args[i + 1])
+        except (IndexError, ValueError):
+            sys.exit(USAGE)
+        del args[i:i + 2]
+    if len(args) not in [1, 2] or workers < 1:
+        sys.exit(USAGE)
+    directory = args[0]
+
+    # Load data once; it stays resident for every query
+    degrees.load_data(directory, compact)
+
+    if len(args) == 2:
+        with open(args[1], encoding="utf-8") as f:
+            groups, errors = read_queries(f)
+    else:
+        groups, errors = read_queries(sys.stdin)
+
+    for result in errors:
+        print(json.dumps(result))
+    for results in answer_all(groups, workers, directory, compact):
+        for result in results:
+            print(json.dumps(result))
+
+
+def read_queries(lines):
+    """
+    Parse tab-separated `source<TAB>target` lines, where each side is a
+    person_id or an unambiguous name.
+
+    Returns a list of (source_id, queries) groups, one per distinct
+    source, and a list of error results for lines that could not be
+    resolved. Each query is a (line number, source, target, target_id)
+    tuple.
+    """
+    groups = {}
+    errors = []
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        fields = line.split("\t")
+        if len(fields) != 2:
+            errors.append({"line": number, "error": "Expected two fields"})
+            continue
+        source, target = fields
+        try:
+            source_id = resolve(source)
+            target_id = resolve(target)
+        except LookupError as e:
+            errors.append({
+                "line": number, "source": source, "target": target,
+                "error": str(e)
+            })
+            continue
+        groups.setdefault(source_id, []).append(
+            (number, source, target, target_id)
+        )
+    return list(groups.items()), errors
+
+
+def resolve(text):
+    """
+    Returns the person_id for `text`, which is either a person_id or a
+    name. Raises LookupError for unknown or ambiguous names, since batch
+    mode cannot ask which person was intended.
+    """
+    if text in degrees.people:
+        return text
+    person_ids = degrees.names.get(text.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    if not person_ids:
+        raise LookupError(f"Person not found: {text}")
+    candidates = ", ".join(sorted(person_ids))
+    raise LookupError(f"Ambiguous name: {text} ({candidates})")
+
+
+def answer_all(groups, workers, directory, compact):
+    """
+    Yield the list of results for each group of queries, answering groups
+    on a pool of `workers` processes when there is more than one.
+    """
+    if workers == 1:
+        yield from map(answer_group, groups)
+        return
+
+    # Forked workers share the already loaded graph instead of reloading it
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    with context.Pool(workers, init_worker, (directory, compact)) as pool:
+        yield from pool.imap(answer_group, groups)
+
+
+def init_worker(directory, compact):
+    if degrees.graph is None:
+        degrees.load_data(directory, compact)
+
+
+def answer_group(group):
+    """
+    Returns a result for each query in a (source_id, queries) group.
+
+    Several queries from the same source share one breadth-first search
+    tree instead of running a separate search each.
+    """
+    source_id, queries = group
+    if len(queries) > 1:
+        targets = [target_id for _, _, _, target_id in queries]
+        tree = degrees.breadth_first_tree(source_id, targets)
+
+    results = []
+    for number, source, target, target_id in queries:
+        if len(queries) > 1:
+            path = degrees.tree_path(tree, target_id)
+        else:
+            path = degrees.shortest_path(source_id, target_id)
+        results.append({
+            "line": number,
+            "source": source,
+            "target": target,
+            "source_id": source_id,
+            "target_id": target_id,
+            "degrees": None if path is None else len(path),
+            "path": None if path is None else [list(step) for step in path]
+        })
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+from landmarks import Landmarks
+from util import Node, QueueFrontier
+
+QUERIES = 200
+
+
+class EagerNode(Node):
+    """
+    The previous util.Node behaviour: every co-star is materialized into
+    a list as soon as the node is created, expanded or not.
+    """
+    __slots__ = ("neighbor_list",)
+
+    def __init__(self, state, parent, action):
+        super().__init__(state, parent, action)
+        self.neighbor_list = list(Node.neighbors(self, degrees.graph))
+
+    def neighbors(self, graph, seen_movies=None):
+        if seen_movies is None:
+            return iter(self.neighbor_list)
+        fresh = [
+            (star, movie) for star, movie in self.neighbor_list
+            if movie not in seen_movies
+        ]
+        seen_movies.update(graph.movies_of(self.state))
+        return iter(fresh)
+
+
+class SlicingQueueFrontier():
+    """
+    The previous util.QueueFrontier: a list that is copied on every
+    remove and scanned linearly for membership.
+    """
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+VARIANTS = [
+    ("EagerNode, SlicingQueueFrontier", EagerNode, SlicingQueueFrontier),
+    ("Node, SlicingQueueFrontier", Node, SlicingQueueFrontier),
+    ("Node, QueueFrontier", Node, QueueFrontier),
+]
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [people]")
+    size = int(sys.argv[1]) if len(sys.argv) == 2 else 20000
+
+    with tempfile.TemporaryDirectory() as synthetic:
+        generate(synthetic, size, size // 3)
+        datasets = [
+            ("small", "small", False),
+            (f"synthetic {size}", synthetic, False),
+            (f"synthetic {size} compact", synthetic, True),
+        ]
+        for label, directory, compact in datasets:
+            print(f"== {label}")
+            start = time.perf_counter()
+            degrees.load_data(directory, compact)
+            print(f"  load: {time.perf_counter() - start:.2f}s")
+
+            pairs = random_pairs(QUERIES)
+            for variant, node, frontier in VARIANTS:
+                degrees.Node = node
+                degrees.QueueFrontier = frontier
+                seconds, peak = bench_shortest_path(pairs)
+                report(f"shortest_path ({variant})", seconds, peak)
+            degrees.Node = Node
+            degrees.QueueFrontier = QueueFrontier
+            bench_landmarks(pairs)
+
+
+def generate(directory, num_people, num_movies, seed=0):
+    """
+    Write a synthetic people/movies/stars dataset to `directory`.
+
+    Cast sizes and the number of movies per person are both skewed, so a
+    few prolific actors and large ensemble casts dominate the edge count,
+    as they do in the IMDb data.
+    """
+    rng = random.Random(seed)
+    with open(os.path.join(directory, "people.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            writer.writerow([i + 1, f"Person {i}", 1900 + i % 100])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(num_movies):
+            writer.writerow([i + 1, f"Movie {i}", 1950 + i % 70])
+
+    with open(os.path.join(directory, "stars.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(num_movies):
+            cast = min(num_people, int(rng.paretovariate(1.2) * 4))
+            for _ in range(cast):
+                person = int(rng.paretovariate(0.5)) * 7919 % num_people
+                writer.writerow([person + 1, movie + 1])
+
+
+def random_pairs(n, seed=1):
+    """
+    Return `n` random (source, target) person_id pairs from the loaded data.
+    """
+    rng = random.Random(seed)
+    person_ids = list(degrees.people)
+    return [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(n)]
+
+
+def bench_shortest_path(pairs, search=None):
+    """
+    Run `search`, by default degrees.shortest_path, over `pairs`,
+    returning the total time in seconds and the largest peak traced
+    allocation of a single query in bytes.
+    """
+    search = search or degrees.shortest_path
+    start = time.perf_counter()
+    for source, target in pairs:
+        search(source, target)
+    seconds = time.perf_counter() - start
+
+    peak = 0
+    tracemalloc.start()
+    for source, target in pairs:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        search(source, target)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def bench_landmarks(pairs):
+    """
+    Time building a landmark index and its bounds, then shortest_path on
+    the same `pairs` with the index loaded, which skips the search for
+    pairs it shows are not connected.
+    """
+    start = time.perf_counter()
+    landmarks = Landmarks.build(degrees.graph.compact())
+    print(f"  landmarks: built {len(landmarks.people)} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    for source, target in pairs:
+        landmarks.bounds(source, target)
+    report("landmark bounds", time.perf_counter() - start, None)
+
+    expected = [degrees.shortest_path(s, t) for s, t in pairs]
+    degrees.landmarks = landmarks
+    try:
+        seconds, peak = bench_shortest_path(pairs)
+        report("shortest_path with landmarks", seconds, peak)
+        for (source, target), path in zip(pairs, expected):
+            found = degrees.shortest_path(source, target)
+            if (path is None) != (found is None) or (
+                    found is not None and len(found) != len(path)):
+                print(f"  mismatch for {source} -> {target}")
+    finally:
+        degrees.landmarks = None
+
+
+def report(label, seconds, peak):
+    if peak is None:
+        print(f"  {label}: {seconds:.3f}s")
+    else:
+        print(f"  {label}: {seconds:.3f}s, "
+              f"peak {peak / 1024:.0f} KiB per query")
+
+
+if __name__ == "__main__":
+    main()
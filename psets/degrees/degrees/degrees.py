@@ -1,6 +1,11 @@
-import csv
 import sys
 
+from distances import Distances
+from graph import DictGraph, PeopleView, MoviesView, NamesView
+from landmarks import load_landmarks
+from loader import describe_report, new_report, read_chunks
+from nameindex import NameIndex, MAX_EDITS
+from snapshot import load_graph
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,54 +17,112 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Prefix and fuzzy NameIndex over the keys of `names`
+name_index = None
 
-def load_data(directory):
+# Adjacency index searched by shortest_path: a DictGraph over the dicts
+# above, or an integer-indexed CompactGraph in compact mode
+graph = None
+
+# Landmarks index saved next to the CSVs by landmarks.py, if up to date
+landmarks = None
+
+
+def load_data(directory, compact=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is true, build a CompactGraph instead of the dicts of
+    dicts, and replace `names`, `people` and `movies` with read-only views
+    over it so the rest of the program works unchanged. The compact graph
+    is mapped from a snapshot file next to the CSVs, which is rebuilt
+    whenever the CSVs change. Either way, a landmark index built by
+    landmarks.py is loaded too when it is up to date.
+
+    Returns a report counting the rows loaded and skipped.
     """
+    global names, people, movies, graph, name_index, landmarks
+    if compact:
+        graph = load_graph(directory)
+        names = NamesView(graph)
+        people = PeopleView(graph)
+        movies = MoviesView(graph)
+        name_index = graph.name_search_index()
+        landmarks = load_landmarks(graph, directory)
+        return graph.report
+
+    names = {}
+    people = {}
+    movies = {}
+    report = new_report()
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
+    path = f"{directory}/people.csv"
+    for chunk in read_chunks(path, ["id", "name", "birth"]):
+        for person_id, name, birth in chunk:
+            report["people"] += 1
+            if person_id in people:
+                report["duplicate_people"] += 1
+                continue
+            people[person_id] = {
+                "name": name,
+                "birth": birth,
                 "movies": set()
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+            if name.lower() not in names:
+                names[name.lower()] = {person_id}
             else:
-                names[row["name"].lower()].add(row["id"])
+                names[name.lower()].add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
+    path = f"{directory}/movies.csv"
+    for chunk in read_chunks(path, ["id", "title", "year"]):
+        for movie_id, title, year in chunk:
+            report["movies"] += 1
+            if movie_id in movies:
+                report["duplicate_movies"] += 1
+                continue
+            movies[movie_id] = {
+                "title": title,
+                "year": year,
                 "stars": set()
             }
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    # Load stars, counting rows that refer to unknown people or movies
+    path = f"{directory}/stars.csv"
+    for chunk in read_chunks(path, ["person_id", "movie_id"]):
+        for person_id, movie_id in chunk:
+            report["stars"] += 1
+            person = people.get(person_id)
+            movie = movies.get(movie_id)
+            if person is None or movie is None:
+                report["dropped_stars"] += 1
+                report["missing_person"] += person is None
+                report["missing_movie"] += movie is None
+                continue
+            person["movies"].add(movie_id)
+            movie["stars"].add(person_id)
+
+    graph = DictGraph(people, movies)
+    name_index = NameIndex.build(names)
+    landmarks = load_landmarks(graph, directory)
+    return report
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--compact] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    report = load_data(directory, compact)
+    for line in describe_report(report):
+        print(line)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,6 +132,11 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
+    if landmarks is not None and source != target:
+        bounds = landmarks.bounds(source, target)
+        if bounds is not None:
+            print(describe_bounds(*bounds))
+
     path = shortest_path(source, target)
 
     if path is None:
@@ -84,102 +152,231 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
+def describe_bounds(lower, upper):
+    """
+    Returns a line describing landmark bounds on the degrees of
+    separation, shown while the exact search runs.
+    """
+    if upper is None:
+        return f"At least {lower} degrees of separation..."
+    if lower == upper:
+        return f"Exactly {lower} degrees of separation..."
+    return f"Between {lower} and {upper} degrees of separation..."
+
+
 def shortest_path(source, target):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    Runs a bidirectional breadth-first search: one frontier grows from
+    `source` and one from `target`, and the smaller of the two is always
+    expanded by a full layer until they meet. Each side searches the
+    bipartite people/movies graph, scanning a movie's cast only the first
+    time that side reaches the movie.
+
+    If a landmark index is loaded and shows the two are not connected,
+    no search is run.
     """
-    """test
-    target : 163, Dustin Hoffman
-    source : 102, kevin bacon
-    probable solution : (104257, 129), (95953, 163)""" 
-
-    # TODO
-    # raise NotImplementedError
-    #  print(f"movies : {movies}\n\n")
-    # print(f"movies : {movies}\n\n")
-    # print(f"people : {people} \n")
-    
-    
-    # print(f"SOURCE: {source}")
-    # print(f"TARGET: {target}")
-    sourceMovies = people[source]["movies"]
-    s = Node(source, None, None, sourceMovies, movies)
-    
-    Q = QueueFrontier()
-    Q.add(s)
-    
-    explored = set()
-    targetNode = None
-    
-    
-    while not Q.empty():
-        u = Q.remove()
-        # print(f"extracted node : {u.state}\n")
-        # print(f"neighbors of u : {u.getNeighbors()}")
-        if u.state == target:
-            # print("found target")
-            targetNode = u
-            # print("\n")
-            # print(f"Target.state : {u.state}, Target.action : {u.action}")
-            break
-        for neighborData in u.getNeighbors():
-            # print(f"neighbor : {neighborData[0]}")
-            if u not in explored:
-                v = Node(neighborData[0], u, neighborData[1],  people[neighborData[0]]["movies"], movies)
-                # print(f"adding ({v.state}, {v.action}) to Q")
-                Q.add(v)
-        explored.add(u)    
-    
-    result = []
-    result.append((targetNode.action, targetNode.state))
-    parent = targetNode.parent
-    # print(f"first parent: {parent.state}")
-    # print(f"parent.parent : {parent.parent}")
-    
-    # result.append(( parent.action, targetNode.state))
-    # print(f"result at start: {result}")
-    while parent.state != source:
-        # print(f"parent.parent : {parent.parent.state}")
-        result.append(( parent.action, parent.state))
-        temp = parent.action
-        parent = parent.parent
-
-    # result.append((temp, parent.state))
-    result.reverse()
-    # print(f"result : {result}")
-    return result
+    if source == target:
+        return []
+    if landmarks is not None and landmarks.bounds(source, target) is None:
+        return None
+
+    source = graph.person_key(source)
+    target = graph.person_key(target)
+    forward = {source: Node(source, None, None)}
+    backward = {target: Node(target, None, None)}
+    forward_movies = set()
+    backward_movies = set()
+    forward_frontier = QueueFrontier()
+    forward_frontier.add(forward[source])
+    backward_frontier = QueueFrontier()
+    backward_frontier.add(backward[target])
 
+    while not forward_frontier.empty() and not backward_frontier.empty():
+        if len(forward_frontier) <= len(backward_frontier):
+            meeting = expand_layer(
+                forward_frontier, forward, forward_movies, backward
+            )
+        else:
+            meeting = expand_layer(
+                backward_frontier, backward, backward_movies, forward
+            )
+        if meeting is not None:
+            return join_paths(forward[meeting], backward[meeting])
+
+    return None
+
+
+def expand_layer(frontier, reached, seen_movies, other):
+    """
+    Expand every node currently in `frontier` by one step, recording new
+    nodes in `reached` and scanned movies in `seen_movies`.
+
+    Returns the first state also reached by the `other` search,
+    or None if the searches have not met yet.
+    """
+    for _ in range(len(frontier)):
+        node = frontier.remove()
+        for state, action in node.neighbors(graph, seen_movies):
+            if state in reached:
+                continue
+            child = Node(state, node, action)
+            reached[state] = child
+            if state in other:
+                return state
+            frontier.add(child)
+    return None
+
+
+def join_paths(forward_node, backward_node):
+    """
+    Returns the (movie_id, person_id) path from the root of the forward
+    search to the root of the backward search, through the person both
+    `forward_node` and `backward_node` stand for.
+    """
+    path = path_to(forward_node)
+    node = backward_node
+    while node.parent is not None:
+        path.append((graph.movie_id(node.action),
+                     graph.person_id(node.parent.state)))
+        node = node.parent
+    return path
+
+
+def path_to(node):
+    """
+    Returns the (movie_id, person_id) path from the root of a search
+    to `node`.
+    """
+    path = []
+    while node.parent is not None:
+        path.append((graph.movie_id(node.action), graph.person_id(node.state)))
+        node = node.parent
+    path.reverse()
+    return path
+
+
+def breadth_first_tree(source, targets):
+    """
+    Returns a dict mapping states to their Node in a breadth-first search
+    tree rooted at `source`.
+
+    The search stops as soon as every person_id in `targets` has been
+    reached, so one tree answers the shortest path from `source` to each
+    of them through tree_path. Targets that a loaded landmark index shows
+    are not connected to `source` are not waited for.
+    """
+    if landmarks is not None:
+        targets = [target for target in targets
+                   if landmarks.bounds(source, target) is not None]
+    root = graph.person_key(source)
+    remaining = {graph.person_key(target) for target in targets} - {root}
+    tree = {root: Node(root, None, None)}
+    seen_movies = set()
+    frontier = QueueFrontier()
+    frontier.add(tree[root])
+
+    while remaining and not frontier.empty():
+        node = frontier.remove()
+        for state, action in node.neighbors(graph, seen_movies):
+            if state not in tree:
+                tree[state] = Node(state, node, action)
+                frontier.add(tree[state])
+                remaining.discard(state)
+    return tree
+
+
+def tree_path(tree, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs from the
+    root of `tree` to `target`, or None if the tree did not reach it.
+    """
+    node = tree.get(graph.person_key(target))
+    if node is None:
+        return None
+    return path_to(node)
+
+
+def distances_from(source):
+    """
+    Returns a Distances holding the degrees of separation from person_id
+    `source` to everyone, with predecessor pointers for rebuilding paths.
+    """
+    compact = graph.compact()
+    return Distances(compact, compact.person_key(source))
 
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If no name matches exactly, offers the closest names instead.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+        person_ids = similar_names(name)
+        if len(person_ids) == 0:
+            return None
+        print(f"No one named '{name}'. Did you mean:")
+        return choose_person(person_ids)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        return choose_person(person_ids)
     else:
         return person_ids[0]
 
 
+def choose_person(person_ids):
+    """
+    Lists `person_ids` with their names and birth years, and returns
+    the one the user picks, or None.
+    """
+    for person_id in person_ids:
+        person = people[person_id]
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def complete_names(prefix, limit=10):
+    """
+    Returns the person_ids of up to `limit` names starting with `prefix`,
+    in name order.
+    """
+    return people_for_keys(name_index.complete(prefix.lower(), limit), limit)
+
+
+def similar_names(name, max_edits=MAX_EDITS, limit=10):
+    """
+    Returns the person_ids of up to `limit` names within `max_edits`
+    edits of `name`, closest first.
+    """
+    keys = name_index.similar(name.lower(), max_edits, limit)
+    return people_for_keys(keys, limit)
+
+
+def people_for_keys(keys, limit):
+    """
+    Returns the person_ids for lowercase names `keys`, up to `limit`.
+    """
+    person_ids = []
+    for key in keys:
+        person_ids.extend(sorted(names[key]))
+    return person_ids[:limit]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
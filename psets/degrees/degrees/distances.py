@@ -0,0 +1,97 @@
+from array import array
+
+
+class Distances():
+
+    def __init__(self, graph, source):
+        """
+        Run a full breadth-first search over CompactGraph `graph` from
+        person index `source`.
+
+        Results are kept as arrays over the interned person index:
+            - `distance[p]`: degrees from the source, or -1 if unreached
+            - `parent[p]`: the previous person on a shortest path, or -1
+            - `via[p]`: the movie shared with `parent[p]`, or -1
+            - `order`: reached people in the order they were found
+            - `layer_ends[d]`: number of people within `d` degrees
+        """
+        self.graph = graph
+        self.source = source
+
+        n = len(graph.person_ids)
+        self.distance = array("i", [-1]) * n
+        self.parent = array("i", [-1]) * n
+        self.via = array("i", [-1]) * n
+        self.order = array("i", [source])
+        self.layer_ends = [1]
+
+        distance, parent, via, order = (
+            self.distance, self.parent, self.via, self.order
+        )
+        # Each movie's cast is scanned only the first time it is reached
+        seen_movies = bytearray(len(graph.movie_ids))
+        distance[source] = 0
+        start = 0
+        while start < len(order):
+            end = len(order)
+            depth = len(self.layer_ends)
+            for i in range(start, end):
+                person = order[i]
+                for movie in graph.movies_of(person):
+                    if seen_movies[movie]:
+                        continue
+                    seen_movies[movie] = 1
+                    for star in graph.stars_of(movie):
+                        if distance[star] < 0:
+                            distance[star] = depth
+                            parent[star] = person
+                            via[star] = movie
+                            order.append(star)
+            if len(order) > end:
+                self.layer_ends.append(len(order))
+            start = end
+
+    def degrees(self, person_id):
+        """
+        Return the degrees of separation from the source to `person_id`,
+        or None if they are not connected.
+        """
+        found = self.distance[self.graph.person_index[person_id]]
+        return None if found < 0 else found
+
+    def path(self, person_id):
+        """
+        Return the shortest list of (movie_id, person_id) pairs from the
+        source to `person_id`, or None if they are not connected.
+        Takes time proportional to the length of the path.
+        """
+        graph = self.graph
+        person = graph.person_index[person_id]
+        if self.distance[person] < 0:
+            return None
+        path = []
+        while person != self.source:
+            path.append((graph.movie_ids[self.via[person]],
+                         graph.person_ids[person]))
+            person = self.parent[person]
+        path.reverse()
+        return path
+
+    def within(self, n):
+        """
+        Return the person_ids of everyone within `n` degrees of the
+        source, nearest first.
+        """
+        if n < 0:
+            return []
+        end = self.layer_ends[min(n, len(self.layer_ends) - 1)]
+        person_ids = self.graph.person_ids
+        return [person_ids[person] for person in self.order[:end]]
+
+    def histogram(self):
+        """
+        Return a list whose entry `d` is the number of people exactly
+        `d` degrees from the source.
+        """
+        ends = self.layer_ends
+        return [ends[0]] + [ends[d] - ends[d - 1] for d in range(1, len(ends))]
@@ -0,0 +1,361 @@
+from array import array
+from collections.abc import Mapping
+
+from loader import new_report, read_chunks
+from nameindex import NameIndex
+
+
+class CompactGraph():
+
+    def __init__(self):
+        """
+        Create an empty compact co-star graph.
+
+        People and movies are interned to dense integer indices. The
+        bipartite people <-> movies adjacency is stored CSR-style, so the
+        movies of person `p` are
+            person_movies[person_offsets[p]:person_offsets[p + 1]]
+        and the stars of movie `m` are found the same way in
+        `movie_stars` through `movie_offsets`.
+        """
+        self.person_ids = []
+        self.person_index = {}
+        self.person_names = []
+        self.person_births = array("i")
+
+        self.movie_ids = []
+        self.movie_index = {}
+        self.movie_titles = []
+        self.movie_years = array("i")
+
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+        # Maps lowercase names to a person index, or a tuple of them
+        self.name_index = {}
+
+        # Prefix and fuzzy NameIndex over name_index, built on first use
+        self.name_search = None
+
+        # Rows counted and skipped while loading, see loader.REPORT_FIELDS
+        self.report = new_report()
+
+        # Snapshot file mapping that the arrays above view, if any
+        self.mapping = None
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Build a compact graph from the people, movies and stars CSV files
+        in `directory`.
+
+        The files are streamed in chunks and IDs are interned as they
+        arrive. Counts of duplicate IDs and of stars rows referring to
+        unknown people or movies, which are skipped, are kept in `report`.
+        """
+        graph = cls()
+        report = graph.report
+
+        for chunk in read_chunks(f"{directory}/people.csv",
+                                 ["id", "name", "birth"]):
+            for person_id, name, birth in chunk:
+                report["people"] += 1
+                if person_id in graph.person_index:
+                    report["duplicate_people"] += 1
+                    continue
+                graph.add_person(person_id, name, birth)
+
+        for chunk in read_chunks(f"{directory}/movies.csv",
+                                 ["id", "title", "year"]):
+            for movie_id, title, year in chunk:
+                report["movies"] += 1
+                if movie_id in graph.movie_index:
+                    report["duplicate_movies"] += 1
+                    continue
+                graph.add_movie(movie_id, title, year)
+
+        star_people = array("i")
+        star_movies = array("i")
+        for chunk in read_chunks(f"{directory}/stars.csv",
+                                 ["person_id", "movie_id"]):
+            for person_id, movie_id in chunk:
+                report["stars"] += 1
+                person = graph.person_index.get(person_id)
+                movie = graph.movie_index.get(movie_id)
+                if person is None or movie is None:
+                    report["dropped_stars"] += 1
+                    report["missing_person"] += person is None
+                    report["missing_movie"] += movie is None
+                    continue
+                star_people.append(person)
+                star_movies.append(movie)
+
+        graph.link(star_people, star_movies)
+        return graph
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Build a compact graph from `people` and `movies` dicts of dicts,
+        as filled in by degrees.load_data.
+        """
+        graph = cls()
+        for person_id, person in people.items():
+            graph.add_person(person_id, person["name"], person["birth"])
+        for movie_id, movie in movies.items():
+            graph.add_movie(movie_id, movie["title"], movie["year"])
+
+        star_people = array("i")
+        star_movies = array("i")
+        for person_id, person in people.items():
+            for movie_id in person["movies"]:
+                star_people.append(graph.person_index[person_id])
+                star_movies.append(graph.movie_index[movie_id])
+
+        graph.link(star_people, star_movies)
+        return graph
+
+    def add_person(self, person_id, name, birth):
+        """
+        Intern a person and return their index.
+        """
+        index = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_index[person_id] = index
+        self.person_names.append(name)
+        self.person_births.append(int(birth) if birth.isdigit() else 0)
+
+        key = name.lower()
+        existing = self.name_index.get(key)
+        if existing is None:
+            self.name_index[key] = index
+        elif isinstance(existing, tuple):
+            self.name_index[key] = existing + (index,)
+        else:
+            self.name_index[key] = (existing, index)
+        return index
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Intern a movie and return its index.
+        """
+        index = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_index[movie_id] = index
+        self.movie_titles.append(title)
+        self.movie_years.append(int(year) if year.isdigit() else 0)
+        return index
+
+    def link(self, star_people, star_movies):
+        """
+        Build both CSR adjacencies from parallel arrays of
+        (person index, movie index) star pairs.
+        """
+        self.person_offsets, self.person_movies = _csr(
+            star_people, star_movies, len(self.person_ids)
+        )
+        self.movie_offsets, self.movie_stars = _csr(
+            star_movies, star_people, len(self.movie_ids)
+        )
+
+    def movies_of(self, person):
+        """
+        Return the movie indices of person index `person`.
+        """
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Return the person indices of the stars of movie index `movie`.
+        """
+        offsets = self.movie_offsets
+        return self.movie_stars[offsets[movie]:offsets[movie + 1]]
+
+    def person_key(self, person_id):
+        """
+        Return the index of the person with IMDB id `person_id`.
+        """
+        return self.person_index[person_id]
+
+    def person_id(self, person):
+        """
+        Return the IMDB id of person index `person`.
+        """
+        return self.person_ids[person]
+
+    def movie_id(self, movie):
+        """
+        Return the IMDB id of movie index `movie`.
+        """
+        return self.movie_ids[movie]
+
+    def compact(self):
+        """
+        Return this graph, which is already integer-indexed.
+        """
+        return self
+
+    def name_search_index(self):
+        """
+        Return the NameIndex over this graph's lowercase names.
+        """
+        if self.name_search is None:
+            self.name_search = NameIndex.build(self.name_index)
+        return self.name_search
+
+    def people_named(self, name):
+        """
+        Return a tuple of person indices whose lowercase name is `name`.
+        """
+        found = self.name_index.get(name, ())
+        return found if isinstance(found, tuple) else (found,)
+
+
+class DictGraph():
+
+    def __init__(self, people, movies):
+        """
+        Wrap the `people` and `movies` dicts of dicts in the same
+        adjacency interface as CompactGraph. Nodes are the IMDB ids
+        themselves.
+        """
+        self.people = people
+        self.movies = movies
+        self.interned = None
+
+    def movies_of(self, person_id):
+        return self.people[person_id]["movies"]
+
+    def stars_of(self, movie_id):
+        return self.movies[movie_id]["stars"]
+
+    def person_key(self, person_id):
+        return person_id
+
+    def person_id(self, person_id):
+        return person_id
+
+    def movie_id(self, movie_id):
+        return movie_id
+
+    def compact(self):
+        """
+        Return an integer-indexed CompactGraph copy of this graph, built
+        on first use.
+        """
+        if self.interned is None:
+            self.interned = CompactGraph.from_dicts(self.people, self.movies)
+        return self.interned
+
+
+def _csr(rows, cols, n):
+    """
+    Return (offsets, indices) arrays for a CSR adjacency over `n` rows,
+    given parallel arrays of row and column indices. Each row's columns
+    are sorted and duplicate pairs are dropped.
+    """
+    starts = array("q", [0]) * (n + 1)
+    for row in rows:
+        starts[row + 1] += 1
+    for i in range(n):
+        starts[i + 1] += starts[i]
+
+    # Counting sort of the pairs by row
+    fill = starts[:-1]
+    grouped = array("i", bytes(4 * len(rows)))
+    for row, col in zip(rows, cols):
+        grouped[fill[row]] = col
+        fill[row] += 1
+
+    offsets = array("i", [0])
+    indices = array("i")
+    for i in range(n):
+        indices.extend(sorted(set(grouped[starts[i]:starts[i + 1]])))
+        offsets.append(len(indices))
+    return offsets, indices
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like the `people` dict:
+    person_id -> {"name", "birth", "movies"}.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        birth = graph.person_births[person]
+        return {
+            "name": graph.person_names[person],
+            "birth": str(birth) if birth else "",
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(person)}
+        }
+
+    def __contains__(self, person_id):
+        return person_id in self.graph.person_index
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like the `movies` dict:
+    movie_id -> {"title", "year", "stars"}.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        year = graph.movie_years[movie]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": str(year) if year else "",
+            "stars": {graph.person_ids[p] for p in graph.stars_of(movie)}
+        }
+
+    def __contains__(self, movie_id):
+        return movie_id in self.graph.movie_index
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like the `names` dict:
+    lowercase name -> set of person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        if name not in self.graph.name_index:
+            raise KeyError(name)
+        person_ids = self.graph.person_ids
+        return {person_ids[p] for p in self.graph.people_named(name)}
+
+    def __contains__(self, name):
+        return name in self.graph.name_index
+
+    def __iter__(self):
+        return iter(self.graph.name_index)
+
+    def __len__(self):
+        return len(self.graph.name_index)
@@ -0,0 +1,173 @@
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+from distances import Distances
+from snapshot import byte_order, load_graph, source_stamp
+
+FILENAME = "degrees.landmarks"
+MAGIC = b"DEGLMK01"
+LANDMARKS = 16
+
+# Header: magic, byte order, CSV stamp, number of people, number of landmarks
+HEADER = struct.Struct("=8sI" + "qq" * 3 + "qq")
+
+
+class Landmarks():
+
+    def __init__(self, graph, people, distances):
+        """
+        Create a landmark index over CompactGraph `graph`.
+
+        `people` holds the person index of each landmark, and
+        `distances[i][p]` is the degrees between landmark `i` and person
+        `p`, or -1 if they are not connected.
+        """
+        self.graph = graph
+        self.people = people
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, k=LANDMARKS):
+        """
+        Run a breadth-first search from each of `k` well-connected people.
+
+        Candidates are taken in order of how many co-star edges they have,
+        skipping anyone who is a direct co-star of a landmark already
+        chosen, so the landmarks do not all sit in one cluster.
+        """
+        n = len(graph.person_ids)
+        edges = [0] * n
+        for person in range(n):
+            for movie in graph.movies_of(person):
+                edges[person] += len(graph.stars_of(movie)) - 1
+
+        people = array("i")
+        distances = []
+        for person in sorted(range(n), key=edges.__getitem__, reverse=True):
+            if len(people) == k or edges[person] == 0:
+                break
+            if any(d[person] == 1 for d in distances):
+                continue
+            people.append(person)
+            distances.append(array("h", Distances(graph, person).distance))
+        return cls(graph, people, distances)
+
+    @classmethod
+    def load(cls, graph, path, stamp):
+        """
+        Map a landmark index saved at `path` over the compact form of
+        `graph`, or return None if it is missing or was built from CSVs
+        other than `stamp`.
+        """
+        try:
+            with open(path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(mapping) < HEADER.size:
+            return None
+        magic, order, *found = HEADER.unpack_from(mapping)
+        n, k = found[-2:]
+        if (magic != MAGIC or order != byte_order()
+                or tuple(found[:-2]) != stamp):
+            return None
+        # Only build a compact copy of a DictGraph once an index matches
+        graph = graph.compact()
+        if (n != len(graph.person_ids)
+                or len(mapping) < HEADER.size + 4 * k + 2 * n * k):
+            return None
+
+        view = memoryview(mapping)
+        offset = HEADER.size
+        people = view[offset:offset + 4 * k].cast("i")
+        offset += 4 * k
+        distances = []
+        for i in range(k):
+            distances.append(view[offset:offset + 2 * n].cast("h"))
+            offset += 2 * n
+        return cls(graph, people, distances)
+
+    def save(self, path, stamp):
+        """
+        Write the index to `path`, tagged with the `stamp` of the CSVs
+        the graph was built from.
+        """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, byte_order(), *stamp,
+                len(self.graph.person_ids), len(self.people)
+            ))
+            f.write(memoryview(self.people).cast("B"))
+            for distance in self.distances:
+                f.write(memoryview(distance).cast("B"))
+        os.replace(temporary, path)
+
+    def bounds(self, source_id, target_id):
+        """
+        Return (lower, upper) bounds on the degrees of separation between
+        two person_ids, from the triangle inequality through each
+        landmark. `upper` is None if no landmark reaches both people.
+
+        Returns None if a landmark shows the two are not connected.
+        """
+        source = self.graph.person_index[source_id]
+        target = self.graph.person_index[target_id]
+        return self.index_bounds(source, target)
+
+    def index_bounds(self, source, target):
+        """
+        Return bounds as in `bounds`, for person indices.
+        """
+        lower = 0
+        upper = None
+        for distance in self.distances:
+            to_source = distance[source]
+            to_target = distance[target]
+            if to_source < 0 and to_target < 0:
+                continue
+            if to_source < 0 or to_target < 0:
+                return None
+            lower = max(lower, abs(to_source - to_target))
+            if upper is None or to_source + to_target < upper:
+                upper = to_source + to_target
+        return lower, upper
+
+
+def load_landmarks(graph, directory):
+    """
+    Return the saved landmark index for `graph`, as loaded from
+    `directory` by degrees.load_data, or None if there is no up-to-date
+    index.
+    """
+    return Landmarks.load(
+        graph, os.path.join(directory, FILENAME), source_stamp(directory)
+    )
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) not in [1, 2]:
+        sys.exit("Usage: python landmarks.py directory [k]")
+    directory = args[0]
+    k = int(args[1]) if len(args) == 2 else LANDMARKS
+
+    # People are indexed in CSV order in both of degrees' loading modes
+    print("Loading data...")
+    graph = load_graph(directory)
+    print("Data loaded.")
+
+    start = time.perf_counter()
+    landmarks = Landmarks.build(graph, k)
+    landmarks.save(os.path.join(directory, FILENAME), source_stamp(directory))
+    elapsed = time.perf_counter() - start
+    print(f"Built {len(landmarks.people)} landmarks in {elapsed:.2f}s.")
+
+
+if __name__ == "__main__":
+    main()
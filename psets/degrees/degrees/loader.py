@@ -0,0 +1,96 @@
+import csv
+import itertools
+import queue
+import threading
+
+# Rows parsed per chunk
+CHUNK_ROWS = 65536
+
+# Counters kept while loading, in the order they are reported
+REPORT_FIELDS = [
+    "people",
+    "movies",
+    "stars",
+    "duplicate_people",
+    "duplicate_movies",
+    "missing_person",
+    "missing_movie",
+    "dropped_stars",
+]
+
+
+def read_chunks(path, columns, size=CHUNK_ROWS):
+    """
+    Yield the rows of CSV file `path` as lists of at most `size` tuples,
+    holding the values of `columns` in that order.
+
+    Rows are parsed on a background thread that stays at most one chunk
+    ahead of the consumer, so only two chunks are ever held in memory.
+    """
+    chunks = queue.Queue(maxsize=1)
+    closed = threading.Event()
+
+    def produce():
+        try:
+            with open(path, encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                fields = [header.index(column) for column in columns]
+                while not closed.is_set():
+                    chunk = [
+                        tuple(row[i] for i in fields)
+                        for row in itertools.islice(reader, size)
+                    ]
+                    if not chunk:
+                        break
+                    send(chunk)
+        except Exception as e:
+            send(e)
+        send(None)
+
+    def send(item):
+        while not closed.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        closed.set()
+        thread.join()
+
+
+def new_report():
+    """
+    Return a load report with every counter at zero.
+    """
+    return {field: 0 for field in REPORT_FIELDS}
+
+
+def describe_report(report):
+    """
+    Return lines describing the rows a load skipped, if any.
+    """
+    lines = []
+    if report["duplicate_people"]:
+        lines.append(f"Skipped {report['duplicate_people']} duplicate people.")
+    if report["duplicate_movies"]:
+        lines.append(f"Skipped {report['duplicate_movies']} duplicate movies.")
+    if report["dropped_stars"]:
+        lines.append(
+            f"Dropped {report['dropped_stars']} stars rows: "
+            f"{report['missing_person']} with an unknown person_id, "
+            f"{report['missing_movie']} with an unknown movie_id."
+        )
+    return lines
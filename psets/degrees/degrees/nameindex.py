@@ -0,0 +1,206 @@
+import itertools
+from array import array
+from bisect import bisect_left
+
+# Edits allowed by default when looking up similar names
+MAX_EDITS = 1
+
+
+class NameIndex():
+
+    def __init__(self, keys, grams, gram_offsets, gram_postings):
+        """
+        Create a name index for prefix completion and fuzzy lookup.
+
+        `keys` holds the sorted lowercase names. `grams` holds every
+        trigram of those names in sorted order, and the positions in `keys`
+        of the names containing trigram `i` are
+            gram_postings[gram_offsets[i]:gram_offsets[i + 1]]
+        """
+        self.keys = keys
+        self.grams = grams
+        self.gram_offsets = gram_offsets
+        self.gram_postings = gram_postings
+
+    @classmethod
+    def build(cls, names):
+        """
+        Build an index over an iterable of lowercase names.
+        """
+        keys = sorted(names)
+        postings = {}
+        for position, key in enumerate(keys):
+            for gram in set(trigrams(key)):
+                postings.setdefault(gram, array("i")).append(position)
+
+        grams = sorted(postings)
+        gram_offsets = array("i", [0])
+        gram_postings = array("i")
+        for gram in grams:
+            gram_postings.extend(postings[gram])
+            gram_offsets.append(len(gram_postings))
+        return cls(keys, grams, gram_offsets, gram_postings)
+
+    def complete(self, prefix, limit=10):
+        """
+        Return up to `limit` names starting with lowercase `prefix`,
+        in sorted order.
+        """
+        keys = self.keys
+        i = bisect_left(keys, prefix)
+        found = []
+        while i < len(keys) and len(found) < limit:
+            key = keys[i]
+            if not key.startswith(prefix):
+                break
+            found.append(key)
+            i += 1
+        return found
+
+    def similar(self, name, max_edits=MAX_EDITS, limit=10):
+        """
+        Return up to `limit` names within `max_edits` edits of lowercase
+        `name`, closest first. Very short names allow fewer edits, since
+        every name is a couple of edits away from them.
+
+        The padded query is cut into `max_edits + 1` pieces. A name within
+        that many edits must contain at least one piece unchanged, so it
+        appears in every trigram list of that piece. Candidates are the
+        intersections of those lists, which are then checked exactly.
+        """
+        padded = f"  {name} "
+        max_edits = max(0, min(max_edits, len(padded) // 3 - 1))
+        lists = [
+            self.postings(padded[j:j + 3]) for j in range(len(padded) - 2)
+        ]
+
+        candidates = set()
+        for start, end in best_cuts([len(p) for p in lists], max_edits + 1):
+            piece = sorted(lists[start:end], key=len)
+            found = set(piece[0])
+            for postings in piece[1:]:
+                if not found:
+                    break
+                found = intersect(found, postings)
+            candidates.update(found)
+
+        masks = character_masks(name)
+        scored = []
+        for position in candidates:
+            key = self.keys[position]
+            if abs(len(key) - len(name)) > max_edits:
+                continue
+            distance = edit_distance(name, key, max_edits, masks)
+            if distance <= max_edits:
+                scored.append((distance, key))
+        scored.sort()
+        return [key for _, key in scored[:limit]]
+
+    def postings(self, gram):
+        """
+        Return the positions in `keys` of the names containing `gram`.
+        """
+        i = bisect_left(self.grams, gram)
+        if i < len(self.grams) and self.grams[i] == gram:
+            start, end = self.gram_offsets[i], self.gram_offsets[i + 1]
+            return self.gram_postings[start:end]
+        return ()
+
+
+def best_cuts(sizes, pieces):
+    """
+    Split a query's trigrams, whose postings lists have `sizes`, into
+    `pieces` runs covering disjoint pieces of the query. Returns the
+    (start, end) trigram ranges of the split with the fewest expected
+    candidates, estimating each run by its shortest list.
+
+    Trigram `j` covers query characters j to j + 2, so a piece of
+    characters [a, b) holds trigrams a to b - 3.
+    """
+    length = len(sizes) + 2
+    best = None
+    for cuts in itertools.combinations(range(3, length - 2), pieces - 1):
+        bounds = (0,) + cuts + (length,)
+        if any(b - a < 3 for a, b in zip(bounds, bounds[1:])):
+            continue
+        runs = [(a, b - 2) for a, b in zip(bounds, bounds[1:])]
+        cost = sum(min(sizes[a:b]) for a, b in runs)
+        if best is None or cost < best[0]:
+            best = (cost, runs)
+    return best[1]
+
+
+def intersect(found, postings):
+    """
+    Return the members of set `found` that are in sorted `postings`.
+
+    A small set is checked by binary search rather than by walking the
+    whole postings list.
+    """
+    if len(found) * 16 >= len(postings):
+        return found.intersection(postings)
+    kept = set()
+    for position in found:
+        i = bisect_left(postings, position)
+        if i < len(postings) and postings[i] == position:
+            kept.add(position)
+    return kept
+
+
+def trigrams(name):
+    """
+    Return the trigrams of `name`, padded so that its start and end
+    count as well.
+    """
+    padded = f"  {name} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def character_masks(a):
+    """
+    Return a dict mapping each character of `a` to a bitmask of the
+    positions where it occurs.
+    """
+    masks = {}
+    for i, c in enumerate(a):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    return masks
+
+
+def edit_distance(a, b, limit, masks=None):
+    """
+    Return the Levenshtein distance between `a` and `b`, or `limit + 1`
+    if it is larger than `limit`. `masks` may be given as
+    character_masks(a) when comparing `a` against many strings.
+
+    Uses Myers' bit-parallel algorithm: one column of the edit distance
+    table is kept as bit vectors of +1/-1 vertical deltas, so each
+    character of `b` costs a handful of integer operations.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if not a:
+        return min(len(b), limit + 1)
+    if masks is None:
+        masks = character_masks(a)
+
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv = mask
+    mv = 0
+    score = len(a)
+    for c in b:
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return min(score, limit + 1)
@@ -0,0 +1,294 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+from graph import CompactGraph
+from loader import REPORT_FIELDS
+from nameindex import NameIndex
+
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP3"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Header: magic, byte order, then (mtime_ns, size) of each source CSV
+HEADER = struct.Struct("=8sI" + "qq" * len(SOURCES))
+
+# Sections in file order, with their array typecodes
+SECTIONS = [
+    ("person_id_blob", "B"),
+    ("person_id_offsets", "q"),
+    ("person_id_order", "i"),
+    ("person_name_blob", "B"),
+    ("person_name_offsets", "q"),
+    ("person_births", "i"),
+    ("movie_id_blob", "B"),
+    ("movie_id_offsets", "q"),
+    ("movie_id_order", "i"),
+    ("movie_title_blob", "B"),
+    ("movie_title_offsets", "q"),
+    ("movie_years", "i"),
+    ("person_offsets", "i"),
+    ("person_movies", "i"),
+    ("movie_offsets", "i"),
+    ("movie_stars", "i"),
+    ("name_key_blob", "B"),
+    ("name_key_offsets", "q"),
+    ("name_offsets", "i"),
+    ("name_people", "i"),
+    ("name_gram_blob", "B"),
+    ("name_gram_offsets", "q"),
+    ("name_gram_starts", "i"),
+    ("name_gram_postings", "i"),
+    ("report", "q"),
+]
+
+# Table of (offset, length in bytes) for each section
+TABLE = struct.Struct("=" + "qq" * len(SECTIONS))
+
+
+def load_graph(directory):
+    """
+    Return a CompactGraph for the CSV files in `directory`.
+
+    The graph is mapped from the snapshot file next to the CSVs when it
+    is up to date with them. Otherwise the CSVs are parsed and a new
+    snapshot is written for later runs.
+    """
+    path = os.path.join(directory, FILENAME)
+    stamp = source_stamp(directory)
+    graph = load(path, stamp)
+    if graph is not None:
+        return graph
+
+    graph = CompactGraph.from_csv(directory)
+    try:
+        save(graph, path, stamp)
+    except OSError:
+        pass
+    return graph
+
+
+def source_stamp(directory):
+    """
+    Return the (mtime_ns, size) pairs of the source CSVs, flattened.
+    """
+    stamp = []
+    for source in SOURCES:
+        info = os.stat(os.path.join(directory, source))
+        stamp.extend([info.st_mtime_ns, info.st_size])
+    return tuple(stamp)
+
+
+def save(graph, path, stamp):
+    """
+    Write `graph` to a snapshot file at `path`, tagged with the `stamp`
+    of the CSVs it was built from.
+    """
+    sections = {}
+    add_strings(sections, "person_id", graph.person_ids)
+    sections["person_id_order"] = sorted_order(graph.person_ids)
+    add_strings(sections, "person_name", graph.person_names)
+    sections["person_births"] = graph.person_births
+    add_strings(sections, "movie_id", graph.movie_ids)
+    sections["movie_id_order"] = sorted_order(graph.movie_ids)
+    add_strings(sections, "movie_title", graph.movie_titles)
+    sections["movie_years"] = graph.movie_years
+    sections["person_offsets"] = graph.person_offsets
+    sections["person_movies"] = graph.person_movies
+    sections["movie_offsets"] = graph.movie_offsets
+    sections["movie_stars"] = graph.movie_stars
+
+    # Names are stored CSR-style: sorted unique keys, each with its people
+    keys = sorted(graph.name_index)
+    add_strings(sections, "name_key", keys)
+    name_offsets = array("i", [0])
+    name_people = array("i")
+    for key in keys:
+        name_people.extend(graph.people_named(key))
+        name_offsets.append(len(name_people))
+    sections["name_offsets"] = name_offsets
+    sections["name_people"] = name_people
+
+    # Trigram postings of the NameIndex refer to positions in `keys`
+    name_search = graph.name_search_index()
+    add_strings(sections, "name_gram", name_search.grams)
+    sections["name_gram_starts"] = name_search.gram_offsets
+    sections["name_gram_postings"] = name_search.gram_postings
+
+    sections["report"] = array(
+        "q", [graph.report[field] for field in REPORT_FIELDS]
+    )
+
+    # Write to a temporary file first so readers never see a partial one
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, byte_order(), *stamp))
+        f.write(bytes(TABLE.size))
+        table = []
+        for name, typecode in SECTIONS:
+            data = memoryview(sections[name]).cast("B")
+            f.write(bytes(-f.tell() % 8))
+            table.extend([f.tell(), len(data)])
+            f.write(data)
+        f.seek(HEADER.size)
+        f.write(TABLE.pack(*table))
+    os.replace(temporary, path)
+
+
+def load(path, stamp):
+    """
+    Map the snapshot at `path` and return it as a CompactGraph whose
+    arrays are views into the mapping, or None if the file is missing,
+    unreadable, or was built from CSVs other than `stamp`.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapping) < HEADER.size + TABLE.size:
+        return None
+    magic, order, *found = HEADER.unpack_from(mapping)
+    if magic != MAGIC or order != byte_order() or tuple(found) != stamp:
+        return None
+
+    table = TABLE.unpack_from(mapping, HEADER.size)
+    view = memoryview(mapping)
+    sections = {}
+    for i, (name, typecode) in enumerate(SECTIONS):
+        offset, length = table[2 * i], table[2 * i + 1]
+        if offset + length > len(mapping):
+            return None
+        sections[name] = view[offset:offset + length].cast(typecode)
+
+    graph = CompactGraph()
+    graph.mapping = mapping
+    graph.person_ids = strings(sections, "person_id")
+    graph.person_index = SortedIndex(
+        graph.person_ids, sections["person_id_order"]
+    )
+    graph.person_names = strings(sections, "person_name")
+    graph.person_births = sections["person_births"]
+    graph.movie_ids = strings(sections, "movie_id")
+    graph.movie_index = SortedIndex(
+        graph.movie_ids, sections["movie_id_order"]
+    )
+    graph.movie_titles = strings(sections, "movie_title")
+    graph.movie_years = sections["movie_years"]
+    graph.person_offsets = sections["person_offsets"]
+    graph.person_movies = sections["person_movies"]
+    graph.movie_offsets = sections["movie_offsets"]
+    graph.movie_stars = sections["movie_stars"]
+    graph.name_index = NameTable(
+        strings(sections, "name_key"),
+        sections["name_offsets"],
+        sections["name_people"]
+    )
+    graph.name_search = NameIndex(
+        graph.name_index.keys,
+        strings(sections, "name_gram"),
+        sections["name_gram_starts"],
+        sections["name_gram_postings"]
+    )
+    graph.report = dict(zip(REPORT_FIELDS, sections["report"]))
+    return graph
+
+
+def byte_order():
+    return 1 if sys.byteorder == "little" else 2
+
+
+def add_strings(sections, name, values):
+    """
+    Store `values` as a UTF-8 blob plus an offsets array under `name`.
+    """
+    blob = bytearray()
+    offsets = array("q", [0])
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    sections[f"{name}_blob"] = blob
+    sections[f"{name}_offsets"] = offsets
+
+
+def strings(sections, name):
+    return StringTable(sections[f"{name}_blob"], sections[f"{name}_offsets"])
+
+
+def sorted_order(values):
+    """
+    Return an array of the indices of `values` in sorted value order.
+    """
+    return array("i", sorted(range(len(values)), key=values.__getitem__))
+
+
+class StringTable(Sequence):
+    """
+    Read-only sequence of strings decoded on access from a UTF-8 blob,
+    where string `i` is blob[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class SortedIndex(Mapping):
+    """
+    Read-only string -> index mapping found by binary search over
+    `order`, the indices of `strings` in sorted string order.
+    """
+
+    def __init__(self, strings, order):
+        self.strings = strings
+        self.order = order
+
+    def __getitem__(self, key):
+        order = self.order
+        i = bisect_left(order, key, key=self.strings.__getitem__)
+        if i < len(order) and self.strings[order[i]] == key:
+            return order[i]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.strings)
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class NameTable(Mapping):
+    """
+    Read-only lowercase name -> tuple of person indices mapping, over
+    sorted unique `keys` whose people are stored CSR-style.
+    """
+
+    def __init__(self, keys, offsets, people):
+        self.keys = keys
+        self.offsets = offsets
+        self.people = people
+
+    def __getitem__(self, name):
+        i = bisect_left(self.keys, name)
+        if i < len(self.keys) and self.keys[i] == name:
+            return tuple(self.people[self.offsets[i]:self.offsets[i + 1]])
+        raise KeyError(name)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
@@ -1,47 +1,74 @@
+from collections import deque
+
+
 class Node():
-    def __init__(self, state, parent, action, nodeMovies, movies):
+    __slots__ = ("state", "parent", "action")
+
+    def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
         self.action = action
-        # test adding neighbours
-        # self.neighbors = set()
-        self.neighbors = []
-        for movie in nodeMovies:
-            for star in movies[movie]["stars"]:
-                if star != state:
-                    self.neighbors.append((star, movie))
-        # print(f"self.neighbors : {self.neighbors}")
-    
-    def getNeighbors(self):
-        return self.neighbors 
+
+    def neighbors(self, graph, seen_movies=None):
+        """
+        Lazily yield (state, action) pairs for every co-star of this node's
+        person in `graph`, where action is the shared movie.
+
+        If a `seen_movies` set is given, movies already in it are skipped
+        and the rest are added to it, so a search scans each cast once.
+        """
+        for movie in graph.movies_of(self.state):
+            if seen_movies is not None:
+                if movie in seen_movies:
+                    continue
+                seen_movies.add(movie)
+            for star in graph.stars_of(movie):
+                if star != self.state:
+                    yield star, movie
 
     def __hash__(self):
         return hash(self.state)
 
-
     def __eq__(self, other):
         return self.state == other.state and self.action == other.action
 
+
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier for each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
 
+    def __len__(self):
+        return len(self.frontier)
+
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+            return self.forget(self.frontier.pop())
+
+    def forget(self, node):
+        """
+        Drop one occurrence of `node.state` from the membership index
+        and return `node`.
+        """
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+        return node
 
 
 class QueueFrontier(StackFrontier):
@@ -50,9 +77,7 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+            return self.forget(self.frontier.popleft())
 
 
 if __name__ == "__main__":
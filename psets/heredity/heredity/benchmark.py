@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+import time
+
+from heredity import enumerate_probabilities
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [people]")
+    size = int(sys.argv[1]) if len(sys.argv) == 2 else 8
+    people = generate(size)
+    print(f"== synthetic family of {size} people")
+
+    serial = None
+    baseline = None
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        start = time.perf_counter()
+        probabilities = enumerate_probabilities(people, workers)
+        seconds = time.perf_counter() - start
+        if serial is None:
+            serial, baseline = probabilities, seconds
+        print(f"  {workers} workers: {seconds:.3f}s, "
+              f"{baseline / seconds:.2f}x speedup")
+        if probabilities != serial:
+            print("  mismatch with 1 worker")
+
+
+def generate(size, seed=0):
+    """
+    Return a family of `size` people, shaped like the result of
+    `load_data`: two founders, then children of random earlier couples
+    or new founders, with about half of the traits observed.
+    """
+    rng = random.Random(seed)
+    people = {}
+    for i in range(size):
+        name = f"Person{i}"
+        mother = father = None
+        if i >= 2 and rng.random() < 0.6:
+            mother, father = rng.sample(sorted(people), 2)
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": rng.choice([None, True, False, False])
+        }
+    return people
+
+
+if __name__ == "__main__":
+    main()
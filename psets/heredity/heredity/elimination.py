@@ -0,0 +1,214 @@
+import heapq
+
+import numpy as np
+
+# Most people in one clique, whose table has 3 ** MAX_CLIQUE entries
+MAX_CLIQUE = 12
+
+
+def elimination_probabilities(people, probs):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    as loaded by `load_data`, given the trait evidence in it and the
+    model `probs`, shaped like the `probabilities` dict of `main`.
+
+    Each person's gene count is a variable, with one table for their
+    gene given their parents' genes and their observed trait, if any.
+    Variables are eliminated one by one, and the cliques this creates
+    form a junction tree: one pass of messages up the tree and one back
+    down give every clique its marginal, so all marginals cost about as
+    much as one. Family trees have few loops, so cliques stay small and
+    this takes time linear in the number of people.
+
+    Raises ValueError if a clique would hold more than MAX_CLIQUE people,
+    as when many families intermarry.
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    factors = local_factors(people, index, probs)
+
+    neighbours = [set() for _ in names]
+    for scope, _ in factors:
+        for i in scope:
+            neighbours[i].update(scope)
+            neighbours[i].discard(i)
+    order = elimination_order(neighbours)
+
+    # The clique of each variable is itself plus its neighbours when it
+    # is eliminated, and its parent is the clique of whichever of those
+    # neighbours is eliminated next
+    position = {v: k for k, v in enumerate(order)}
+    cliques, parent = {}, {}
+    for v in order:
+        separator = tuple(sorted(neighbours[v], key=position.get))
+        cliques[v] = (v,) + separator
+        if len(cliques[v]) > MAX_CLIQUE:
+            raise ValueError(
+                f"Pedigree too interconnected for exact inference: "
+                f"{len(cliques[v])} people share one clique"
+            )
+        parent[v] = separator[0] if separator else None
+        for u in neighbours[v]:
+            neighbours[u].update(neighbours[v])
+            neighbours[u].discard(u)
+            neighbours[u].discard(v)
+    children = {v: [] for v in order}
+    for v in order:
+        if parent[v] is not None:
+            children[parent[v]].append(v)
+
+    # Each table joins the clique of its first eliminated variable, which
+    # holds the rest of its scope
+    assigned = {v: [] for v in order}
+    for scope, table in factors:
+        assigned[min(scope, key=position.get)].append((scope, table))
+
+    # Upward pass: each clique sums itself out into its parent
+    up = {}
+    for v in order:
+        incoming = assigned[v] + [
+            (cliques[c][1:], up[c]) for c in children[v]
+        ]
+        if parent[v] is not None:
+            up[v] = contract(incoming, cliques[v][1:])
+
+    # Downward pass: each clique sends its children everything else
+    down = {}
+    marginals = {}
+    for v in reversed(order):
+        own = list(assigned[v])
+        if parent[v] is not None:
+            own.append((cliques[v][1:], down[v]))
+        messages = [(cliques[c][1:], up[c]) for c in children[v]]
+        marginals[v] = contract(own + messages, (v,))
+        for k, c in enumerate(children[v]):
+            others = own + messages[:k] + messages[k + 1:]
+            down[c] = contract(others, cliques[c][1:])
+
+    probabilities = {}
+    for name in names:
+        genes = marginals[index[name]]
+        probabilities[name] = {
+            "gene": {g: float(genes[g]) for g in (2, 1, 0)},
+            "trait": trait_distribution(people[name]["trait"], genes, probs)
+        }
+    return probabilities
+
+
+def local_factors(people, index, probs):
+    """
+    Return one (scope, table) pair per person: the probability of each
+    of their gene counts, given each gene count of their mother and
+    father if they are known, times the probability of their trait if
+    it was observed. Scopes are tuples of person indices, matching the
+    table's axes.
+    """
+    inheritance = inheritance_table(probs)
+    prior = np.array([probs["gene"][g] for g in range(3)])
+    factors = []
+    for name, person in people.items():
+        i = index[name]
+        evidence = np.ones(3)
+        if person["trait"] is not None:
+            evidence = np.array(
+                [probs["trait"][g][person["trait"]] for g in range(3)]
+            )
+        if person["mother"] is None:
+            factors.append(((i,), prior * evidence))
+        else:
+            mother, father = index[person["mother"]], index[person["father"]]
+            table = inheritance * evidence[:, None, None]
+            factors.append(((i, mother, father), table))
+    return factors
+
+
+def inheritance_table(probs):
+    """
+    Return an array whose entry [g, m, f] is the probability that a
+    child has g copies of the gene when their mother has m copies and
+    their father has f copies.
+
+    A parent passes the gene on with the same probabilities as in
+    `joint_probability`.
+    """
+    mutation = probs["mutation"]
+    passes = np.array([mutation, (1 - mutation) * 0.5, 1 - mutation])
+    mother, father = passes[:, None], passes[None, :]
+    return np.stack([
+        (1 - mother) * (1 - father),
+        mother * (1 - father) + father * (1 - mother),
+        mother * father
+    ])
+
+
+def trait_distribution(observed, genes, probs):
+    """
+    Return the distribution of a trait that was `observed` (True, False
+    or None if unknown), given the distribution `genes` of gene counts.
+    """
+    if observed is not None:
+        return {True: float(observed), False: float(not observed)}
+    has_trait = sum(genes[g] * probs["trait"][g][True] for g in range(3))
+    return {True: float(has_trait), False: float(1 - has_trait)}
+
+
+def elimination_order(neighbours):
+    """
+    Return an order in which to eliminate the variables of the graph
+    given by the `neighbours` sets, greedily choosing the variable whose
+    elimination adds the fewest edges between its neighbours.
+    """
+    neighbours = [set(adjacent) for adjacent in neighbours]
+    heap = [(fill_in(neighbours, v), v) for v in range(len(neighbours))]
+    heapq.heapify(heap)
+    eliminated = set()
+    order = []
+    while heap:
+        fill, v = heapq.heappop(heap)
+        if v in eliminated or fill != fill_in(neighbours, v):
+            continue
+        eliminated.add(v)
+        order.append(v)
+        affected = set(neighbours[v])
+        for u in neighbours[v]:
+            neighbours[u] |= neighbours[v]
+            neighbours[u].discard(u)
+            neighbours[u].discard(v)
+        for u in list(affected):
+            affected |= neighbours[u]
+        affected -= eliminated
+        for u in affected:
+            heapq.heappush(heap, (fill_in(neighbours, u), u))
+    return order
+
+
+def fill_in(neighbours, v):
+    """
+    Return how many pairs of neighbours of `v` are not yet adjacent.
+    """
+    adjacent = list(neighbours[v])
+    return sum(
+        1 for i, u in enumerate(adjacent) for w in adjacent[i + 1:]
+        if w not in neighbours[u]
+    )
+
+
+def contract(factors, keep):
+    """
+    Multiply the (scope, table) pairs in `factors` together and sum out
+    every variable not in `keep`, returning a table over `keep` scaled
+    to sum to 1, so long chains of messages do not underflow. Variables
+    of `keep` that no factor mentions are left uniform.
+    """
+    labels = {}
+    operands = []
+    mentioned = set(v for scope, _ in factors for v in scope)
+    factors = factors + [
+        ((v,), np.ones(3)) for v in keep if v not in mentioned
+    ]
+    for scope, table in factors:
+        operands.append(table)
+        operands.append([labels.setdefault(v, len(labels)) for v in scope])
+    result = np.einsum(*operands, [labels[v] for v in keep],
+                       optimize=len(labels) > 6)
+    return result / result.sum()
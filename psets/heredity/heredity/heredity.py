@@ -1,8 +1,13 @@
 import csv
 import itertools
+import multiprocessing
 import sys
 from copy import *
 
+from elimination import elimination_probabilities
+from sampling import gibbs_sampling, likelihood_weighting
+from vectorized import vectorized_probabilities
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -37,16 +42,153 @@ PROBS = {
     "mutation": 0.01
 }
 
+METHODS = [
+    "enumeration", "vectorized", "elimination", "likelihood", "gibbs"
+]
+USAGE = ("Usage: python heredity.py "
+         "[--method enumeration|vectorized|elimination|likelihood|gibbs] "
+         "[--workers N] [--samples N] [--seed S] data.csv")
+
+# Default sample budget of the approximate methods
+SAMPLES = 10000
+
+# Each shard fixes the genes of this many leading people, giving up to
+# 3 ** SHARD_PEOPLE shards whatever the number of workers, so results do
+# not depend on it
+SHARD_PEOPLE = 3
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    args = sys.argv[1:]
+    method = pop_option(args, "--method") or "enumeration"
+    workers = pop_option(args, "--workers") or "1"
+    samples = pop_option(args, "--samples") or str(SAMPLES)
+    seed = pop_option(args, "--seed")
+    counts = [workers, samples]
+    if not all(count.isdigit() and int(count) > 0 for count in counts):
+        sys.exit(USAGE)
+    if seed is not None and not seed.isdigit():
+        sys.exit(USAGE)
+    if len(args) != 1 or method not in METHODS:
+        sys.exit(USAGE)
+    people = load_data(args[0])
+    errors = None
+
+    if method in ["likelihood", "gibbs"]:
+        sample = (likelihood_weighting if method == "likelihood"
+                  else gibbs_sampling)
+        try:
+            probabilities, errors = sample(
+                people, PROBS, int(samples), seed and int(seed)
+            )
+        except ValueError as e:
+            sys.exit(str(e))
+        print(f"Estimates from {samples} samples (± standard error)")
+    elif method == "elimination":
+        try:
+            probabilities = elimination_probabilities(people, PROBS)
+        except ValueError as e:
+            sys.exit(str(e))
+    elif method == "vectorized":
+        probabilities = vectorized_probabilities(people, PROBS)
+    else:
+        probabilities = enumerate_probabilities(people, int(workers))
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                if errors is None:
+                    print(f"    {value}: {p:.4f}")
+                else:
+                    error = errors[person][field][value]
+                    print(f"    {value}: {p:.4f} ± {error:.4f}")
+
 
+def pop_option(args, flag):
+    """
+    Remove `flag` and the value after it from `args` and return that
+    value, or None if `flag` is not given.
+    """
+    if flag not in args:
+        return None
+    i = args.index(flag)
+    if i + 1 == len(args):
+        sys.exit(USAGE)
+    value = args[i + 1]
+    del args[i:i + 2]
+    return value
+
+
+def enumerate_probabilities(people, workers=1):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    by summing the joint probability of every assignment of genes and
+    traits that agrees with the trait evidence.
+
+    The assignments are split into shards by the genes of the first
+    SHARD_PEOPLE people, run on a pool of `workers` processes when there
+    is more than one. Shard tables are added up in shard order, so the
+    result is exactly the same for any number of workers.
+    """
+    leading = list(people)[:SHARD_PEOPLE]
+    tasks = [(people, shard) for shard in gene_assignments(leading)]
+    if workers == 1:
+        partials = itertools.starmap(enumerate_shard, tasks)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            partials = pool.starmap(enumerate_shard, tasks)
+
+    probabilities = empty_probabilities(people)
+    for partial in partials:
+        for person in probabilities:
+            for field in probabilities[person]:
+                for value in probabilities[person][field]:
+                    probabilities[person][field][value] += (
+                        partial[person][field][value]
+                    )
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return probabilities
+
+
+def enumerate_shard(people, shard):
+    """
+    Return the unnormalized gene and trait probabilities of every person
+    in `people` summed over one shard of the assignments: those where the
+    first SHARD_PEOPLE people have the genes given by `shard`, a
+    (one_gene, two_genes) pair over them, combined with every trait
+    assignment that agrees with the evidence.
+    """
+    probabilities = empty_probabilities(people)
+    rest = list(people)[SHARD_PEOPLE:]
+    fixed_one, fixed_two = shard
+    trait_sets = list(trait_assignments(people))
+
+    # Loop over all sets of the remaining people who might have the gene
+    for one_gene, two_genes in gene_assignments(rest):
+        one_gene = one_gene | fixed_one
+        two_genes = two_genes | fixed_two
+        for have_trait in trait_sets:
+
+            # Update probabilities with new joint probability
+            p = joint_probability(people, one_gene, two_genes, have_trait)
+            update(probabilities, one_gene, two_genes, have_trait, p)
+    return probabilities
+
+
+def empty_probabilities(people):
+    """
+    Return a table of zero gene and trait probabilities for each person.
+    """
     # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -60,39 +202,6 @@ def main():
         }
         for person in people
     }
-    # print(f"prob : {probabilities}")
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
-
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
 
 
 def load_data(filename):
@@ -119,14 +228,38 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Yield all possible subsets of set s, one at a time.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    for subset in itertools.chain.from_iterable(
+        itertools.combinations(s, r) for r in range(len(s) + 1)
+    ):
+        yield set(subset)
+
+
+def trait_assignments(people):
+    """
+    Yield every set of people who might have the trait, given what is
+    known: people whose trait was observed are always in or out of it,
+    so only the unknown people's subsets are enumerated.
+    """
+    known = set(
+        person for person in people if people[person]["trait"] is True
+    )
+    unknown = [person for person in people if people[person]["trait"] is None]
+    for subset in powerset(unknown):
+        yield known | subset
+
+
+def gene_assignments(names):
+    """
+    Yield every (one_gene, two_genes) pair of disjoint subsets of list
+    `names`, one at a time, always in the same order.
+    """
+    for one_gene in powerset(names):
+        rest = [name for name in names if name not in one_gene]
+        for two_genes in powerset(rest):
+            yield one_gene, two_genes
 
 
 def joint_probability(people, one_gene, two_genes, have_trait):
@@ -0,0 +1,271 @@
+import numpy as np
+
+from elimination import inheritance_table
+
+# Likelihood weighting draws this many samples at a time
+BATCH = 4096
+
+# Independent Gibbs chains, run side by side
+CHAINS = 64
+
+# Sweeps each Gibbs chain discards first, as a fraction of those it keeps
+BURN_IN = 0.1
+
+
+class Pedigree():
+
+    def __init__(self, people, probs):
+        """
+        Index `people`, as loaded by `load_data`, as arrays over person
+        numbers for the model `probs`: each person's parents, or -1 for
+        founders, their children, the log likelihood of their observed
+        trait for each gene count, and an order that puts parents before
+        their children.
+        """
+        self.names = list(people)
+        index = {name: i for i, name in enumerate(self.names)}
+        self.n = n = len(self.names)
+        self.mother = np.full(n, -1)
+        self.father = np.full(n, -1)
+        for i, name in enumerate(self.names):
+            if people[name]["mother"] is not None:
+                self.mother[i] = index[people[name]["mother"]]
+                self.father[i] = index[people[name]["father"]]
+
+        # Each child as (child, other parent, whether this is the mother)
+        self.children = [[] for _ in range(n)]
+        for c in range(n):
+            if self.mother[c] >= 0:
+                self.children[self.mother[c]].append(
+                    (c, self.father[c], True)
+                )
+                self.children[self.father[c]].append(
+                    (c, self.mother[c], False)
+                )
+
+        self.prior = np.array([probs["gene"][g] for g in range(3)])
+        self.inheritance = inheritance_table(probs)
+        self.trait = np.array([probs["trait"][g][True] for g in range(3)])
+        self.observed = [people[name]["trait"] for name in self.names]
+        self.log_evidence = np.zeros((n, 3))
+        with np.errstate(divide="ignore"):
+            self.log_prior = np.log(self.prior)
+            self.log_inheritance = np.log(self.inheritance)
+            for i, observed in enumerate(self.observed):
+                if observed is not None:
+                    self.log_evidence[i] = np.log(
+                        [probs["trait"][g][observed] for g in range(3)]
+                    )
+
+        self.order = []
+        placed = np.zeros(n, dtype=bool)
+        for i in range(n):
+            self.place(i, placed)
+
+    def place(self, i, placed):
+        """
+        Append person `i` to the order after their ancestors, unless
+        already `placed`.
+        """
+        stack = [i]
+        while stack:
+            j = stack[-1]
+            if placed[j]:
+                stack.pop()
+                continue
+            parents = [p for p in (self.mother[j], self.father[j])
+                       if p >= 0 and not placed[p]]
+            if parents:
+                stack.extend(parents)
+                continue
+            placed[j] = True
+            self.order.append(j)
+            stack.pop()
+
+    def forward(self, size, rng):
+        """
+        Return an (n, size) array of gene counts drawn from the model
+        without evidence, parents before children.
+        """
+        genes = np.empty((self.n, size), dtype=np.intp)
+        for i in self.order:
+            if self.mother[i] < 0:
+                genes[i] = rng.choice(3, size, p=self.prior)
+            else:
+                chances = self.inheritance[
+                    :, genes[self.mother[i]], genes[self.father[i]]
+                ]
+                genes[i] = draw(chances.T, rng)
+        return genes
+
+    def conditional(self, i, genes):
+        """
+        Return the log probability, up to a constant, of each gene count
+        of person `i` given everyone else's `genes` in each column, as a
+        (columns, 3) array: their own inheritance, their trait, and what
+        they pass on to each child.
+        """
+        if self.mother[i] < 0:
+            log_p = np.tile(self.log_prior, (genes.shape[1], 1))
+        else:
+            log_p = self.log_inheritance[
+                :, genes[self.mother[i]], genes[self.father[i]]
+            ].T.copy()
+        log_p += self.log_evidence[i]
+        for c, other, is_mother in self.children[i]:
+            if is_mother:
+                log_p += self.log_inheritance[genes[c], :, genes[other]]
+            else:
+                log_p += self.log_inheritance[genes[c], genes[other], :]
+        return log_p
+
+    def results(self, genes, traits, gene_errors, trait_errors):
+        """
+        Return dicts shaped like the `probabilities` of `main` for the
+        (n, 3) gene marginals and (n,) trait marginals, and for their
+        standard errors. Observed traits are certain.
+        """
+        probabilities = {}
+        errors = {}
+        for i, name in enumerate(self.names):
+            trait, trait_error = traits[i], trait_errors[i]
+            if self.observed[i] is not None:
+                trait, trait_error = float(self.observed[i]), 0.0
+            probabilities[name] = {
+                "gene": {g: float(genes[i, g]) for g in (2, 1, 0)},
+                "trait": {True: float(trait), False: float(1 - trait)}
+            }
+            errors[name] = {
+                "gene": {g: float(gene_errors[i, g]) for g in (2, 1, 0)},
+                "trait": {True: float(trait_error),
+                          False: float(trait_error)}
+            }
+        return probabilities, errors
+
+
+def likelihood_weighting(people, probs, samples, seed=None):
+    """
+    Estimate the gene and trait distribution of every person in
+    `people` from `samples` likelihood-weighted samples, drawn with
+    generator seed `seed`.
+
+    Genes are drawn parents first from the model, ignoring the evidence,
+    and each sample is weighted by the likelihood of the observed
+    traits. Unobserved traits are not drawn: each sample contributes the
+    probability of the trait given its genes. Returns two dicts shaped
+    like the `probabilities` of `main`: the estimates, and the standard
+    error of each from the delta method for a ratio estimate.
+    """
+    pedigree = Pedigree(people, probs)
+    rng = np.random.default_rng(seed)
+    people_index = np.arange(pedigree.n)[:, None]
+
+    # Sums over samples of the weight w, and of w * x, w ** 2 * x and
+    # w ** 2 * x ** 2, where x is a gene indicator or a trait
+    # probability, with weights relative to the largest seen so far
+    shift = -np.inf
+    sums = {
+        "w": 0.0, "w2": 0.0,
+        "gene_w": 0.0, "gene_w2": 0.0,
+        "trait_w": 0.0, "trait_w2": 0.0, "trait_w2x2": 0.0
+    }
+    for start in range(0, samples, BATCH):
+        size = min(BATCH, samples - start)
+        genes = pedigree.forward(size, rng)
+        log_w = pedigree.log_evidence[people_index, genes].sum(axis=0)
+        peak = log_w.max()
+        if peak == -np.inf:
+            continue
+        if peak > shift:
+            rescale = np.exp(shift - peak)
+            for key in sums:
+                sums[key] *= rescale if "w2" not in key else rescale ** 2
+            shift = peak
+        w = np.exp(log_w - shift)
+        w2 = w * w
+        traits = pedigree.trait[genes]
+        indicators = np.stack([genes == g for g in range(3)], axis=-1)
+        sums["w"] += w.sum()
+        sums["w2"] += w2.sum()
+        sums["gene_w"] += np.einsum("ijg,j->ig", indicators, w)
+        sums["gene_w2"] += np.einsum("ijg,j->ig", indicators, w2)
+        sums["trait_w"] += traits @ w
+        sums["trait_w2"] += traits @ w2
+        sums["trait_w2x2"] += (traits * traits) @ w2
+
+    if sums["w"] == 0:
+        raise ValueError("Evidence has zero probability under the model")
+    genes = sums["gene_w"] / sums["w"]
+    traits = sums["trait_w"] / sums["w"]
+
+    # For indicators x ** 2 == x, so the last two sums are the same
+    gene_errors = ratio_error(
+        genes, sums["gene_w2"], sums["gene_w2"], sums["w2"], sums["w"]
+    )
+    trait_errors = ratio_error(
+        traits, sums["trait_w2"], sums["trait_w2x2"], sums["w2"], sums["w"]
+    )
+    return pedigree.results(genes, traits, gene_errors, trait_errors)
+
+
+def gibbs_sampling(people, probs, samples, seed=None, chains=CHAINS):
+    """
+    Estimate the gene and trait distribution of every person in
+    `people` from `samples` Gibbs samples, split across `chains`
+    independent chains run side by side with generator seed `seed`.
+
+    Each chain starts from a forward sample and, once per sweep, redraws
+    each person's genes given their parents', their children's and
+    their trait. Every redraw also adds the distribution it drew from to
+    the estimates. Returns two dicts shaped like the `probabilities`
+    of `main`: the means over the chains, and their standard errors.
+    """
+    pedigree = Pedigree(people, probs)
+    rng = np.random.default_rng(seed)
+    chains = max(1, min(chains, samples))
+    sweeps = -(-samples // chains)
+    burn_in = int(sweeps * BURN_IN)
+
+    genes = pedigree.forward(chains, rng)
+    gene_sums = np.zeros((pedigree.n, chains, 3))
+    for sweep in range(burn_in + sweeps):
+        for i in pedigree.order:
+            log_p = pedigree.conditional(i, genes)
+            chances = np.exp(log_p - log_p.max(axis=1, keepdims=True))
+            chances /= chances.sum(axis=1, keepdims=True)
+            genes[i] = draw(chances, rng)
+            if sweep >= burn_in:
+                gene_sums[i] += chances
+
+    chain_genes = gene_sums / sweeps
+    chain_traits = chain_genes @ pedigree.trait
+    results = [chain_genes.mean(axis=1), chain_traits.mean(axis=1)]
+    if chains > 1:
+        results.append(chain_genes.std(axis=1, ddof=1) / np.sqrt(chains))
+        results.append(chain_traits.std(axis=1, ddof=1) / np.sqrt(chains))
+    else:
+        results.extend([np.full((pedigree.n, 3), np.nan),
+                        np.full(pedigree.n, np.nan)])
+    return pedigree.results(*results)
+
+
+def draw(chances, rng):
+    """
+    Return one index drawn from each row of `chances`, an array of rows
+    of probabilities over three values.
+    """
+    u = rng.random(len(chances))
+    cumulative = np.cumsum(chances, axis=1)
+    return ((u > cumulative[:, 0]).astype(np.intp)
+            + (u > cumulative[:, 1]))
+
+
+def ratio_error(estimate, weighted, weighted_squares, weight_squares, weight):
+    """
+    Return the standard error of self-normalized estimates `estimate`,
+    given the sums of w ** 2 * x, w ** 2 * x ** 2 and w ** 2 over the
+    samples, and the sum of the weights w.
+    """
+    variance = (weighted_squares - 2 * estimate * weighted
+                + estimate ** 2 * weight_squares)
+    return np.sqrt(np.maximum(variance, 0)) / weight
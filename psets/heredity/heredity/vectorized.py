@@ -0,0 +1,91 @@
+import numpy as np
+
+from elimination import inheritance_table
+
+# Assignments whose joint probabilities are computed in one batch
+CHUNK = 1 << 16
+
+
+def vectorized_probabilities(people, probs, chunk=CHUNK):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    as loaded by `load_data`, by enumerating every assignment of genes
+    and traits that agrees with the trait evidence, like
+    `enumerate_probabilities`, but `chunk` assignments at a time.
+
+    Assignment `k` is decoded into integer arrays, with gene in {0, 1, 2}
+    and trait in {0, 1} for each person, from the digits of `k`. The log
+    joint probability of a whole batch is then one sum of lookups into
+    log tables of each person's gene given their parents and trait given
+    their gene. The probabilities are added up into the marginals with
+    matrix products instead of one `update` per assignment.
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+    unknown = [i for i, name in enumerate(names)
+               if people[name]["trait"] is None]
+    known = [i for i, name in enumerate(names)
+             if people[name]["trait"] is not None]
+    known_traits = [int(people[names[i]]["trait"]) for i in known]
+    founders = [i for i, name in enumerate(names)
+                if people[name]["mother"] is None]
+    children = [i for i, name in enumerate(names)
+                if people[name]["mother"] is not None]
+    mothers = [index[people[names[i]]["mother"]] for i in children]
+    fathers = [index[people[names[i]]["father"]] for i in children]
+
+    # Impossible cases get a log probability of -inf, and weight 0
+    with np.errstate(divide="ignore"):
+        log_prior = np.log([probs["gene"][g] for g in range(3)])
+        log_inheritance = np.log(inheritance_table(probs))
+        log_trait = np.log([
+            [probs["trait"][g][False], probs["trait"][g][True]]
+            for g in range(3)
+        ])
+
+    gene_places = 3 ** np.arange(n, dtype=np.int64)
+    trait_places = 2 ** np.arange(len(unknown), dtype=np.int64)
+    total = 3 ** n * 2 ** len(unknown)
+
+    # Weights are kept relative to the largest log probability so far
+    shift = -np.inf
+    weight = 0.0
+    gene_sums = np.zeros((n, 3))
+    trait_sums = np.zeros(n)
+    for start in range(0, total, chunk):
+        k = np.arange(start, min(start + chunk, total), dtype=np.int64)
+        genes = k[:, None] // gene_places % 3
+        traits = np.empty_like(genes)
+        traits[:, known] = known_traits
+        traits[:, unknown] = k[:, None] // 3 ** n // trait_places % 2
+
+        log_p = log_trait[genes, traits].sum(axis=1)
+        log_p += log_prior[genes[:, founders]].sum(axis=1)
+        log_p += log_inheritance[
+            genes[:, children], genes[:, mothers], genes[:, fathers]
+        ].sum(axis=1)
+
+        peak = log_p.max()
+        if peak == -np.inf:
+            continue
+        if peak > shift:
+            rescale = np.exp(shift - peak)
+            weight *= rescale
+            gene_sums *= rescale
+            trait_sums *= rescale
+            shift = peak
+        p = np.exp(log_p - shift)
+        weight += p.sum()
+        for g in range(3):
+            gene_sums[:, g] += p @ (genes == g)
+        trait_sums += p @ traits
+
+    probabilities = {}
+    for i, name in enumerate(names):
+        has_trait = float(trait_sums[i] / weight)
+        probabilities[name] = {
+            "gene": {g: float(gene_sums[i, g] / weight) for g in (2, 1, 0)},
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return probabilities
@@ -0,0 +1,223 @@
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import engine
+from crawler import crawl_graph
+from engine import (
+    EXTRAPOLATIONS, METHODS, Transitions, edit_residual, power_iteration,
+    push_iteration
+)
+from incremental import changed_pages
+from pagerank import DAMPING
+
+
+def legacy_crawl(directory):
+    """
+    The previous pagerank.crawl: each page is read whole and matched with
+    one regex, then a second pass drops links outside the corpus.
+    """
+    pages = dict()
+    for filename in os.listdir(directory):
+        if not filename.endswith(".html"):
+            continue
+        with open(os.path.join(directory, filename)) as f:
+            contents = f.read()
+            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
+            pages[filename] = set(links) - {filename}
+    for filename in pages:
+        pages[filename] = set(
+            link for link in pages[filename]
+            if link in pages
+        )
+    return pages
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [pages]")
+    size = int(sys.argv[1]) if len(sys.argv) == 2 else 20000
+    workers = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as corpus:
+        generate(corpus, size)
+        print(f"== synthetic corpus of {size} pages")
+
+        start = time.perf_counter()
+        expected = legacy_crawl(corpus)
+        report("legacy crawl", size, time.perf_counter() - start)
+
+        for count in sorted({1, workers}):
+            start = time.perf_counter()
+            graph = crawl_graph(corpus, count, cache=False)
+            report(f"crawl_graph ({count} workers)", size,
+                   time.perf_counter() - start)
+            if graph.corpus() != expected:
+                print("  mismatch with legacy crawl")
+
+        bench_cache(corpus, size, expected)
+        bench_ranks(corpus, size, expected)
+        bench_methods(corpus)
+    check_without_scipy()
+
+
+def bench_cache(corpus, size, expected):
+    """
+    Time crawls that write the link graph cache, reuse it unchanged, and
+    patch it after 0.1% of the pages are rewritten with an extra link.
+    """
+    for label in ["cache cold", "cache unchanged"]:
+        start = time.perf_counter()
+        crawl_graph(corpus)
+        report(label, size, time.perf_counter() - start)
+
+    edit_pages(corpus, size, expected, 2)
+    start = time.perf_counter()
+    graph = crawl_graph(corpus)
+    report("cache after 0.1% edited", size, time.perf_counter() - start)
+    if graph.corpus() != expected:
+        print("  mismatch after edits")
+
+
+def bench_ranks(corpus, size, expected):
+    """
+    Compare a full power iteration with an incremental update from the
+    previous ranks, after 0.1% of the pages gain a link.
+    """
+    old = Transitions(crawl_graph(corpus))
+    ranks = power_iteration(old, DAMPING)
+    edit_pages(corpus, size, expected, 3)
+    new = Transitions(crawl_graph(corpus))
+    exact = power_iteration(new, DAMPING, tolerance=1e-12)
+
+    start = time.perf_counter()
+    found = power_iteration(new, DAMPING)
+    seconds = time.perf_counter() - start
+    error = np.abs(found - exact).sum()
+    print(f"  full power iteration: {seconds:.3f}s, L1 error {error:.1e}")
+
+    start = time.perf_counter()
+    changed = changed_pages(old, new)
+    residual = edit_residual(old, new, changed, ranks, DAMPING)
+    found = push_iteration(new, DAMPING, ranks, residual)
+    seconds = time.perf_counter() - start
+    error = np.abs(found - exact).sum()
+    print(f"  incremental update: {seconds:.3f}s, L1 error {error:.1e}")
+
+
+def bench_methods(corpus):
+    """
+    Compare every iteration method and extrapolation on `corpus`, by
+    time, sweeps and error. The rate at which plain sweeps shrink the
+    change tells how slowly the graph mixes: near the damping factor,
+    convergence is as slow as it can be, and acceleration pays off most.
+    """
+    transitions = Transitions(crawl_graph(corpus))
+    exact = power_iteration(transitions, DAMPING, tolerance=1e-12)
+    for method in METHODS:
+        for extrapolation in EXTRAPOLATIONS:
+            changes = []
+            found = power_iteration(
+                transitions, DAMPING, method=method,
+                extrapolation=extrapolation,
+                monitor=lambda sweep, change, seconds: changes.append(
+                    (change, seconds)
+                )
+            )
+            seconds = changes[-1][1]
+            error = np.abs(found - exact).sum()
+            label = method + (f" + {extrapolation}" if extrapolation else "")
+            print(f"  {label}: {seconds:.3f}s, {len(changes)} sweeps, "
+                  f"L1 error {error:.1e}")
+            if method == "jacobi" and extrapolation is None:
+                rate = (changes[-1][0] / changes[0][0]) ** (
+                    1 / max(1, len(changes) - 1)
+                )
+                print(f"    change shrinks {rate:.3f}x per sweep")
+
+
+def check_without_scipy():
+    """
+    Run every iteration method with scipy disabled, on the bundled
+    corpora and on a corpus with no links between its pages, and report
+    any that fail or disagree with the scipy result.
+    """
+    print("== without scipy")
+    with tempfile.TemporaryDirectory() as unlinked:
+        for name in ["a.html", "b.html"]:
+            with open(os.path.join(unlinked, name), "w") as f:
+                f.write('<a href="https://example.com/">elsewhere</a>\n')
+        corpora = [
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+            for name in ["corpus0", "corpus1", "corpus2"]
+        ] + [unlinked]
+        for corpus in corpora:
+            graph = crawl_graph(corpus, cache=False)
+            expected = power_iteration(Transitions(graph), DAMPING)
+            saved, engine.scipy = engine.scipy, None
+            try:
+                for method in METHODS:
+                    for extrapolation in EXTRAPOLATIONS:
+                        found = power_iteration(
+                            Transitions(graph), DAMPING, method=method,
+                            extrapolation=extrapolation
+                        )
+                        if np.abs(found - expected).sum() > 1e-5:
+                            print(f"  mismatch: {method}, {extrapolation}, "
+                                  f"{os.path.basename(corpus)}")
+            finally:
+                engine.scipy = saved
+    print("  done")
+
+
+def edit_pages(corpus, size, expected, seed):
+    """
+    Append a random link to 0.1% of the pages in `corpus`, updating the
+    `expected` crawl to match.
+    """
+    rng = random.Random(seed)
+    for i in rng.sample(range(size), max(1, size // 1000)):
+        page = f"{i}.html"
+        target = f"{rng.randrange(size)}.html"
+        with open(os.path.join(corpus, page), "a") as f:
+            f.write(f'<a href="{target}">{target}</a>\n')
+        if target != page:
+            expected[page].add(target)
+
+
+def generate(directory, num_pages, seed=0):
+    """
+    Write a synthetic corpus of `num_pages` HTML pages to `directory`.
+
+    Link counts are skewed and links favour low-numbered pages, so a few
+    hubs collect most of the links. Pages carry some filler text and a
+    few links outside the corpus, as crawled pages do.
+    """
+    rng = random.Random(seed)
+    filler = "<p>" + "Lorem ipsum dolor sit amet. " * 40 + "</p>\n"
+    for i in range(num_pages):
+        count = min(num_pages, int(rng.paretovariate(1.5) * 3))
+        links = [
+            f"{int(rng.paretovariate(0.7)) * 7919 % num_pages}.html"
+            for _ in range(count)
+        ]
+        links.append("https://example.com/")
+        with open(os.path.join(directory, f"{i}.html"), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<head><title>{i}</title>"
+                    f"</head>\n<body>\n<h1>{i}</h1>\n{filler}<ul>\n")
+            for link in links:
+                f.write(f'<li><a class="link" href="{link}">{link}</a></li>\n')
+            f.write(f"</ul>\n{filler}</body>\n</html>\n")
+
+
+def report(label, pages, seconds):
+    print(f"  {label}: {seconds:.3f}s, {pages / seconds:.0f} pages/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from linkgraph import LinkGraph
+
+FILENAME = "pagerank.cache"
+MAGIC = b"PRCACHE1"
+
+# Bytes of the content hash kept for each page
+DIGEST_SIZE = 16
+
+# Header: magic, byte order
+HEADER = struct.Struct("=8sI")
+
+# Sections in file order, with their array typecodes
+SECTIONS = [
+    ("page_blob", "B"),
+    ("page_offsets", "q"),
+    ("stats", "q"),
+    ("digests", "B"),
+    ("href_blob", "B"),
+    ("href_offsets", "q"),
+    ("page_hrefs", "q"),
+    ("graph_offsets", "q"),
+    ("graph_links", "i"),
+]
+
+# Table of (offset, length in bytes) for each section
+TABLE = struct.Struct("=" + "qq" * len(SECTIONS))
+
+
+class Cache():
+
+    def __init__(self, sections):
+        """
+        Wrap the sections of a crawl cache:
+            - `stats`: (mtime_ns, size) of each page, flattened
+            - `digests`: the content hash of each page
+            - the raw link targets of each page, as UTF-8 bytes, including
+              links outside the corpus, so the graph can be rebuilt when
+              pages are added or removed
+            - `graph`: the LinkGraph crawled from those pages
+        """
+        self.sections = sections
+        blob, offsets = sections["page_blob"], sections["page_offsets"]
+        pages = [
+            str(blob[offsets[i]:offsets[i + 1]], "utf-8")
+            for i in range(len(offsets) - 1)
+        ]
+        self.stats = sections["stats"]
+        self.graph = LinkGraph(
+            pages, sections["graph_offsets"], sections["graph_links"]
+        )
+
+    def stat(self, page):
+        """
+        Return the (mtime_ns, size) cached for page index `page`.
+        """
+        return tuple(self.stats[2 * page:2 * page + 2])
+
+    def digest(self, page):
+        """
+        Return the content hash cached for page index `page`.
+        """
+        start = page * DIGEST_SIZE
+        return bytes(self.sections["digests"][start:start + DIGEST_SIZE])
+
+    def hrefs(self, page):
+        """
+        Return the raw link targets cached for page index `page`.
+        """
+        blob = self.sections["href_blob"]
+        offsets = self.sections["href_offsets"]
+        page_hrefs = self.sections["page_hrefs"]
+        return [
+            bytes(blob[offsets[i]:offsets[i + 1]])
+            for i in range(page_hrefs[page], page_hrefs[page + 1])
+        ]
+
+
+def load(path):
+    """
+    Map the crawl cache at `path` and return it as a Cache whose arrays
+    are views into the mapping, or None if it is missing or unreadable.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapping) < HEADER.size + TABLE.size:
+        return None
+    magic, order = HEADER.unpack_from(mapping)
+    if magic != MAGIC or order != byte_order():
+        return None
+
+    table = TABLE.unpack_from(mapping, HEADER.size)
+    view = memoryview(mapping)
+    sections = {}
+    for i, (name, typecode) in enumerate(SECTIONS):
+        offset, length = table[2 * i], table[2 * i + 1]
+        if offset + length > len(mapping):
+            return None
+        sections[name] = view[offset:offset + length].cast(typecode)
+    return Cache(sections)
+
+
+def save(path, stats, digests, hrefs, graph):
+    """
+    Write a crawl cache to `path` for LinkGraph `graph`, given the
+    flattened `stats`, the `digests` and the lists of raw `hrefs` of its
+    pages.
+    """
+    sections = {}
+    names = [page.encode("utf-8") for page in graph.pages]
+    add_strings(sections, "page", names)
+    sections["stats"] = stats
+    sections["digests"] = b"".join(digests)
+    add_strings(sections, "href", [href for page in hrefs for href in page])
+    page_hrefs = array("q", [0])
+    for page in hrefs:
+        page_hrefs.append(page_hrefs[-1] + len(page))
+    sections["page_hrefs"] = page_hrefs
+    sections["graph_offsets"] = graph.offsets
+    sections["graph_links"] = graph.links
+
+    # Write to a temporary file first so readers never see a partial one
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, byte_order()))
+        f.write(bytes(TABLE.size))
+        table = []
+        for name, typecode in SECTIONS:
+            data = memoryview(sections[name]).cast("B")
+            f.write(bytes(-f.tell() % 8))
+            table.extend([f.tell(), len(data)])
+            f.write(data)
+        f.seek(HEADER.size)
+        f.write(TABLE.pack(*table))
+    os.replace(temporary, path)
+
+
+def byte_order():
+    return 1 if sys.byteorder == "little" else 2
+
+
+def add_strings(sections, name, values):
+    """
+    Store byte strings `values` as a blob plus an offsets array under
+    `name`.
+    """
+    blob = bytearray()
+    offsets = array("q", [0])
+    for value in values:
+        blob += value
+        offsets.append(len(blob))
+    sections[f"{name}_blob"] = blob
+    sections[f"{name}_offsets"] = offsets
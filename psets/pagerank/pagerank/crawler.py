@@ -0,0 +1,179 @@
+import functools
+import hashlib
+import multiprocessing
+import os
+import re
+from array import array
+
+from cache import DIGEST_SIZE, FILENAME, load, save
+from linkgraph import LinkGraph
+
+# Bytes read from a page at a time
+CHUNK_BYTES = 1 << 16
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+
+class LinkExtractor():
+
+    def __init__(self):
+        """
+        Collect link targets from HTML bytes that arrive in pieces.
+
+        Bytes from the last "<" onwards are held back until a ">" follows
+        them, since they may be a tag cut in two by the piece boundary.
+        """
+        self.pending = b""
+        self.links = []
+
+    def feed(self, data):
+        data = self.pending + data
+        cut = data.rfind(b"<")
+        if cut < 0 or data.find(b">", cut) >= 0:
+            cut = len(data)
+        self.links.extend(LINK.findall(data, 0, cut))
+        self.pending = data[cut:]
+
+    def close(self):
+        """
+        Scan any bytes still held back, and return every link found.
+        """
+        self.links.extend(LINK.findall(self.pending))
+        self.pending = b""
+        return self.links
+
+
+def crawl_graph(directory, workers=1, cache=True):
+    """
+    Parse a directory of HTML pages into a LinkGraph, keeping only links
+    to other pages in the corpus.
+
+    Each page is streamed through a LinkExtractor, on a pool of `workers`
+    processes when there is more than one. Links are interned to page
+    indices, so the graph is built without an intermediate dict of sets.
+
+    With `cache`, the graph is saved to a cache file in `directory` with
+    the mtime, size, content hash and raw links of every page. Later
+    crawls only read pages whose mtime or size changed, and only rebuild
+    the links of pages whose content changed, or of every page if pages
+    were added or removed.
+    """
+    pages, stats = list_pages(directory, cache)
+    path = os.path.join(directory, FILENAME)
+    cached = load(path) if cache else None
+    if cached is not None:
+        positions = cached.graph.index
+        same_pages = cached.graph.pages == pages
+        if same_pages and cached.stats == stats:
+            return cached.graph
+    else:
+        positions = {}
+        same_pages = False
+
+    stale = [
+        i for i, page in enumerate(pages)
+        if page not in positions
+        or cached.stat(positions[page]) != tuple(stats[2 * i:2 * i + 2])
+    ]
+    paths = [os.path.join(directory, pages[i]) for i in stale]
+    scanned = dict(zip(stale, scan_pages(paths, workers, cache)))
+
+    index = {page.encode("utf-8"): i for i, page in enumerate(pages)}
+    digests = []
+    hrefs = []
+    rows = []
+    for i, page in enumerate(pages):
+        if i in scanned:
+            digest, page_hrefs = scanned[i]
+            unchanged = (page in positions
+                         and cached.digest(positions[page]) == digest)
+        else:
+            digest = cached.digest(positions[page])
+            page_hrefs = cached.hrefs(positions[page])
+            unchanged = True
+        digests.append(digest)
+        hrefs.append(page_hrefs)
+        if same_pages and unchanged:
+            rows.append(cached.graph.links_of(i))
+        else:
+            rows.append(intern(page_hrefs, index, i))
+    graph = build(pages, rows)
+
+    if cache:
+        try:
+            save(path, stats, digests, hrefs, graph)
+        except OSError:
+            pass
+    return graph
+
+
+def list_pages(directory, stat=True):
+    """
+    Return the sorted names of the HTML pages in `directory`, and an
+    array of their (mtime_ns, size) pairs, flattened, or None unless
+    `stat` is true.
+    """
+    entries = sorted(
+        (entry.name, entry) for entry in os.scandir(directory)
+        if entry.name.endswith(".html")
+    )
+    if not stat:
+        return [name for name, _ in entries], None
+    stats = array("q")
+    for _, entry in entries:
+        info = entry.stat()
+        stats.extend([info.st_mtime_ns, info.st_size])
+    return [name for name, _ in entries], stats
+
+
+def scan_pages(paths, workers, hashing=True):
+    """
+    Return the result of `scan_page` for each of `paths`, in order, on a
+    pool of `workers` processes when there is more than one.
+    """
+    scan = functools.partial(scan_page, hashing=hashing)
+    if workers == 1 or len(paths) < 2:
+        return list(map(scan, paths))
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(scan, paths, chunksize=64)
+
+
+def scan_page(path, hashing=True):
+    """
+    Return (content hash, sorted distinct link targets) for the HTML file
+    at `path`. Targets are left as UTF-8 bytes. The hash is None unless
+    `hashing` is true.
+    """
+    extractor = LinkExtractor()
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE) if hashing else None
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            if hashing:
+                digest.update(chunk)
+            extractor.feed(chunk)
+    links = sorted(set(extractor.close()))
+    return (digest.digest() if hashing else None), links
+
+
+def intern(hrefs, index, page):
+    """
+    Return a sorted array of the indices of the pages linked to by page
+    index `page`, given its raw `hrefs` and an `index` mapping UTF-8
+    encoded page names to indices.
+    """
+    found = set(index[href] for href in hrefs if href in index)
+    found.discard(page)
+    return array("i", sorted(found))
+
+
+def build(pages, rows):
+    """
+    Return a LinkGraph over `pages` from an iterable of the link arrays
+    of each page, in page order.
+    """
+    offsets = array("q", [0])
+    links = array("i")
+    for row in rows:
+        links.extend(row)
+        offsets.append(len(links))
+    return LinkGraph(pages, offsets, links)
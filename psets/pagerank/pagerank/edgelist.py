@@ -0,0 +1,149 @@
+import functools
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from cache import byte_order
+from crawler import list_pages, scan_page
+from engine import MAX_ITERATIONS, TOLERANCE
+
+MAGIC = b"PREDGES1"
+
+# Header: magic, byte order, number of pages, number of edges
+HEADER = struct.Struct("=8sIqq")
+
+# Edges streamed through memory at a time, at least one per page
+CHUNK_EDGES = 1 << 22
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python edgelist.py corpus edges")
+    pages, edges = convert(sys.argv[1], sys.argv[2])
+    print(f"Wrote {edges} links between {pages} pages to {sys.argv[2]}")
+
+
+def convert(directory, path, workers=1):
+    """
+    Crawl the HTML pages in `directory` into an edge list file at `path`,
+    and return its number of pages and edges.
+
+    The file holds a header, then every link as a pair of int32 page
+    indices (source, target), in order of source, then the page names as
+    UTF-8 separated by NUL bytes. Pages are scanned one at a time, on a
+    pool of `workers` processes when there is more than one, and their
+    links written out straight away, so only the page names are held in
+    memory.
+    """
+    pages, _ = list_pages(directory, stat=False)
+    index = {page.encode("utf-8"): i for i, page in enumerate(pages)}
+    paths = [os.path.join(directory, page) for page in pages]
+    scan = functools.partial(scan_page, hashing=False)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    edges = 0
+    with open(temporary, "wb") as f:
+        f.write(bytes(HEADER.size + -HEADER.size % 8))
+        pool = multiprocessing.Pool(workers) if workers > 1 else None
+        try:
+            scanned = (pool.imap(scan, paths, chunksize=64) if pool
+                       else map(scan, paths))
+            for source, (_, hrefs) in enumerate(scanned):
+                targets = set(index[href] for href in hrefs if href in index)
+                targets.discard(source)
+                pairs = array("i")
+                for target in sorted(targets):
+                    pairs.extend([source, target])
+                f.write(pairs)
+                edges += len(targets)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+        f.write(b"\0".join(page.encode("utf-8") for page in pages))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, byte_order(), len(pages), edges))
+    os.replace(temporary, path)
+    return len(pages), edges
+
+
+def load_edges(path):
+    """
+    Return (pages, edges) from the edge list file at `path`, where
+    `edges` is an (m, 2) array of (source, target) pairs memory-mapped
+    from the file rather than read into memory.
+
+    Raises ValueError if `path` is not an edge list written by `convert`
+    on a machine of the same byte order.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"Not an edge list: {path}")
+        magic, order, num_pages, num_edges = HEADER.unpack(header)
+        if magic != MAGIC or order != byte_order():
+            raise ValueError(f"Not an edge list: {path}")
+        start = HEADER.size + -HEADER.size % 8
+        f.seek(start + num_edges * 8)
+        names = f.read().split(b"\0") if num_pages else []
+    pages = [str(name, "utf-8") for name in names]
+    if len(pages) != num_pages:
+        raise ValueError(f"Truncated edge list: {path}")
+    if num_edges == 0:
+        return pages, np.empty((0, 2), dtype=np.int32)
+    edges = np.memmap(path, dtype=np.int32, mode="r", offset=start,
+                      shape=(num_edges, 2))
+    return pages, edges
+
+
+def edge_pagerank(edges, n, damping_factor, tolerance=TOLERANCE,
+                  max_iterations=MAX_ITERATIONS, monitor=None):
+    """
+    Return the PageRank vector over `n` pages linked by `edges`, an
+    (m, 2) array of distinct (source, target) pairs, typically
+    memory-mapped by `load_edges`.
+
+    Each sweep streams the edges once, in chunks of CHUNK_EDGES, so only
+    a few vectors of length `n` are held in memory however many edges
+    there are. Stops, and calls `monitor`, as power_iteration does.
+    """
+    chunk = max(CHUNK_EDGES, n)
+    out_degree = np.zeros(n, dtype=np.int64)
+    for start in range(0, len(edges), chunk):
+        out_degree += np.bincount(
+            edges[start:start + chunk, 0], minlength=n
+        )
+
+    # Pages without links are treated as linking to every page
+    dangling = out_degree == 0
+    scale = np.zeros(n)
+    scale[~dangling] = 1 / out_degree[~dangling]
+
+    ranks = np.full(n, 1 / n)
+    began = time.perf_counter()
+    for sweep in range(1, max_iterations + 1):
+        weighted = ranks * scale
+        updated = np.full(n, ranks[dangling].sum() / n)
+        for start in range(0, len(edges), chunk):
+            block = np.asarray(edges[start:start + chunk])
+            updated += np.bincount(
+                block[:, 1], weights=weighted[block[:, 0]], minlength=n
+            )
+        updated *= damping_factor
+        updated += (1 - damping_factor) / n
+        change = np.abs(updated - ranks).sum()
+        ranks = updated
+        if monitor is not None:
+            monitor(sweep, change, time.perf_counter() - began)
+        if change < tolerance:
+            break
+    return ranks
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import time
+
+import numpy as np
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
+# Iteration stops once the L1 change between sweeps drops below this
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+
+# Row blocks updated in turn by a Gauss-Seidel sweep
+BLOCKS = 64
+
+# Sweeps between extrapolations, which need this many iterates to work
+EXTRAPOLATE_EVERY = 10
+
+
+class Transitions():
+
+    def __init__(self, graph):
+        """
+        Precompute the link structure of LinkGraph `graph` for power
+        iteration.
+
+        Each link (s -> t) carries weight 1 / outdegree(s). With scipy
+        installed, the links are held as a CSR matrix whose row `t` lists
+        the pages linking to `t`. Otherwise the graph's target array is
+        paired with an array of sources and summed with `np.bincount`.
+        Either is built on the first full sweep, since pushes from a few
+        pages only need the graph's own arrays.
+        """
+        self.n = len(graph)
+        self.offsets = np.frombuffer(graph.offsets, dtype=np.int64)
+        self.targets = np.frombuffer(graph.links, dtype=np.int32)
+        self.out_degree = out_degree = np.diff(self.offsets)
+
+        # Pages without links are treated as linking to every page
+        self.dangling = np.flatnonzero(out_degree == 0)
+        self.scale = np.zeros(self.n)
+        linked = out_degree > 0
+        self.scale[linked] = 1 / out_degree[linked]
+
+        self.matrix = None
+        self.sources = None
+        self.blocks = None
+
+    def spread(self, ranks):
+        """
+        Return the rank each page receives through links, when page `i`
+        splits `ranks[i]` evenly between the pages it links to. `ranks`
+        may also be an (n, k) matrix of k rank vectors.
+        """
+        if self.matrix is None and self.sources is None:
+            if scipy is not None:
+                # Column `s` of a CSC matrix over the graph's own arrays
+                # holds the links of page `s`; converting gives rows by
+                # target
+                self.matrix = scipy.sparse.csc_matrix(
+                    (np.repeat(self.scale, self.out_degree), self.targets,
+                     self.offsets),
+                    shape=(self.n, self.n)
+                ).tocsr()
+            else:
+                self.sources = np.repeat(
+                    np.arange(self.n, dtype=np.int32), self.out_degree
+                )
+        if self.matrix is not None:
+            return self.matrix @ ranks
+        if ranks.ndim == 2:
+            return np.column_stack([self.spread(column) for column in ranks.T])
+        weighted = (ranks * self.scale)[self.sources]
+        # Without links, bincount returns integers
+        return np.bincount(
+            self.targets, weights=weighted, minlength=self.n
+        ).astype(float)
+
+    def row_blocks(self):
+        """
+        Return the links split into BLOCKS runs of consecutive target
+        pages, as a list of (start, stop, links) where `links` gives the
+        rank each of pages `start` to `stop` receives.
+        """
+        if self.blocks is not None:
+            return self.blocks
+        bounds = np.linspace(0, self.n, min(BLOCKS, self.n) + 1).astype(int)
+        self.blocks = []
+        if scipy is not None:
+            self.spread(np.zeros(self.n))
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                self.blocks.append((start, stop, self.matrix[start:stop]))
+        else:
+            order = np.argsort(self.targets, kind="stable")
+            targets = self.targets[order]
+            sources = np.repeat(
+                np.arange(self.n, dtype=np.int32), self.out_degree
+            )[order]
+            cuts = np.searchsorted(targets, bounds)
+            for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+                run = slice(cuts[i], cuts[i + 1])
+                self.blocks.append(
+                    (start, stop, (sources[run], targets[run] - start))
+                )
+        return self.blocks
+
+    def receive(self, links, size, ranks):
+        """
+        Return the rank the `size` pages of a row block with `links`
+        receive, when page `i` splits `ranks[i]` between its links.
+        """
+        if scipy is not None:
+            return links @ ranks
+        if ranks.ndim == 2:
+            return np.column_stack(
+                [self.receive(links, size, column) for column in ranks.T]
+            )
+        sources, targets = links
+        weighted = ranks[sources] * self.scale[sources]
+        # Without links, bincount returns integers
+        return np.bincount(
+            targets, weights=weighted, minlength=size
+        ).astype(float)
+
+    def follow(self, ranks, teleport=None):
+        """
+        Return the rank each page receives when every page passes all of
+        its rank along its links, or if it has none, to the pages of
+        `teleport`, every page by default.
+        """
+        following = self.spread(ranks)
+        stranded = ranks[self.dangling].sum(axis=0)
+        if teleport is None:
+            following += stranded / self.n
+        else:
+            following += stranded * teleport
+        return following
+
+    def push(self, residual, pages, amounts):
+        """
+        Add each of `amounts` to `residual`, split evenly between the
+        pages linked to by the matching page index in `pages`, or between
+        every page if it has no links.
+        """
+        degree = self.out_degree[pages]
+        linked = degree > 0
+        residual += amounts[~linked].sum() / self.n
+        pages, amounts, degree = pages[linked], amounts[linked], degree[linked]
+        np.add.at(
+            residual, self.targets[self.link_positions(pages)],
+            np.repeat(amounts / degree, degree)
+        )
+
+    def link_positions(self, pages):
+        """
+        Return the position in the target array of every link of each
+        page index in `pages`, page by page.
+        """
+        degree = self.out_degree[pages]
+        ends = np.cumsum(degree)
+        total = ends[-1] if len(ends) else 0
+        return (np.arange(total) - np.repeat(ends - degree, degree)
+                + np.repeat(self.offsets[pages], degree))
+
+    def step(self, ranks, damping_factor, teleport=None):
+        """
+        Return the ranks after one step of the random surfer, who jumps
+        to a page drawn from `teleport`, uniform by default, instead of
+        following a link with probability `1 - damping_factor`, and
+        always from a page without links.
+        """
+        following = self.follow(ranks, teleport)
+        following *= damping_factor
+        if teleport is None:
+            following += (1 - damping_factor) / self.n
+        else:
+            following += (1 - damping_factor) * teleport
+        return following
+
+    def gauss_seidel_step(self, ranks, damping_factor, teleport=None):
+        """
+        Return the ranks after one block Gauss-Seidel sweep: like `step`,
+        but pages are updated one row block at a time, and each block
+        already sees the new ranks of the blocks before it.
+
+        Dangling pages pass on the rank they had at the start of the
+        sweep, which leaves the fixed point unchanged.
+        """
+        ranks = np.array(ranks, dtype=float)
+        stranded = damping_factor * ranks[self.dangling].sum(axis=0)
+        # Rank that jumps, from dangling pages or instead of a link
+        jumping = stranded + 1 - damping_factor
+        for start, stop, links in self.row_blocks():
+            received = self.receive(links, stop - start, ranks)
+            received *= damping_factor
+            if teleport is None:
+                received += jumping / self.n
+            else:
+                received += jumping * teleport[start:stop]
+            ranks[start:stop] = received
+        ranks /= ranks.sum(axis=0)
+        return ranks
+
+
+def power_iteration(transitions, damping_factor, start=None,
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                    teleport=None, method="jacobi", extrapolation=None,
+                    monitor=None):
+    """
+    Return the PageRank vector for `transitions`, by stepping from the
+    `start` ranks (uniform by default) until the L1 change between
+    sweeps is below `tolerance`.
+
+    `teleport` is the distribution the surfer jumps to, uniform by
+    default. Given as an (n, k) matrix whose columns are distributions,
+    the k PageRank vectors are computed together, and each sweep is one
+    sparse-by-dense matrix product.
+
+    `method` is "jacobi", where every sweep is one `step`, or
+    "gauss-seidel". `extrapolation`, "aitken" or "quadratic", replaces
+    the ranks every EXTRAPOLATE_EVERY sweeps by an estimate of their
+    limit from the last few iterates. `monitor`, if given, is called
+    after every sweep with the sweep number, the L1 change and the
+    seconds elapsed.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    if extrapolation not in EXTRAPOLATIONS:
+        raise ValueError(f"Unknown extrapolation: {extrapolation}")
+    step = (transitions.step if method == "jacobi"
+            else transitions.gauss_seidel_step)
+    extrapolate = EXTRAPOLATIONS[extrapolation]
+
+    n = transitions.n
+    if start is not None:
+        ranks = np.asarray(start, dtype=float)
+    elif teleport is not None:
+        ranks = np.asarray(teleport, dtype=float)
+    else:
+        ranks = np.full(n, 1 / n)
+    began = time.perf_counter()
+    history = [ranks]
+    for sweep in range(1, max_iterations + 1):
+        updated = step(ranks, damping_factor, teleport)
+        difference = updated - ranks
+        change = np.abs(difference, out=difference).sum(axis=0).max()
+        ranks = updated
+        if monitor is not None:
+            monitor(sweep, change, time.perf_counter() - began)
+        if change < tolerance:
+            break
+        if extrapolate is not None:
+            history = history[-3:] + [ranks]
+            if sweep % EXTRAPOLATE_EVERY == 0:
+                ranks = extrapolate(history)
+    return ranks
+
+
+def aitken(history):
+    """
+    Return the Aitken delta-squared estimate of the limit of the last
+    three iterates in `history`, page by page.
+
+    Where the estimate is undefined or not positive, the last iterate is
+    kept instead.
+    """
+    older, old, ranks = history[-3:]
+    first = ranks - old
+    second = first - (old - older)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        estimate = ranks - first * first / second
+    keep = ~np.isfinite(estimate) | (estimate <= 0)
+    estimate[keep] = ranks[keep]
+    return estimate / estimate.sum(axis=0)
+
+
+def quadratic_extrapolation(history):
+    """
+    Return the quadratic extrapolation of the last four iterates in
+    `history`, which removes the components of the two next-largest
+    eigenvalues, assuming the error lies mostly along them.
+    """
+    if len(history) < 4:
+        return history[-1]
+    base, *rest = history[-4:]
+    columns = [x.reshape(len(x), -1) for x in [base] + rest]
+    estimate = np.empty_like(columns[-1])
+    for j in range(estimate.shape[1]):
+        x = [column[:, j] for column in columns]
+        y = np.column_stack([x[1] - x[0], x[2] - x[0]])
+        gamma = -np.linalg.lstsq(y, x[3] - x[0], rcond=None)[0]
+        beta0 = gamma[0] + gamma[1] + 1
+        beta1 = gamma[1] + 1
+        estimate[:, j] = beta0 * x[1] + beta1 * x[2] + x[3]
+    estimate = np.where(estimate > 0, estimate, columns[-1])
+    estimate /= estimate.sum(axis=0)
+    return estimate.reshape(history[-1].shape)
+
+
+METHODS = ("jacobi", "gauss-seidel")
+
+EXTRAPOLATIONS = {
+    None: None,
+    "aitken": aitken,
+    "quadratic": quadratic_extrapolation,
+}
+
+
+def edit_residual(old, new, pages, ranks, damping_factor):
+    """
+    Return how far one step of the surfer on Transitions `new` moves
+    `ranks`, beyond how far it moved them on `old`, when only the links
+    of page indices `pages` differ between the two.
+
+    Only the rank those pages pass along their links changes, so this
+    takes time proportional to their links rather than to the graph.
+    """
+    residual = np.zeros(new.n)
+    amounts = damping_factor * ranks[pages]
+    new.push(residual, pages, amounts)
+    old.push(residual, pages, -amounts)
+    return residual
+
+
+def push_iteration(transitions, damping_factor, ranks, residual,
+                   tolerance=TOLERANCE, max_rounds=MAX_ITERATIONS,
+                   monitor=None):
+    """
+    Return the PageRank vector for `transitions`, correcting approximate
+    `ranks` by `residual`, such as the edit_residual of ranks computed
+    before a small edit.
+
+    Gauss-Southwell style, residual is only pushed from pages where it
+    is large: it is added to the page's rank, and `damping_factor` times
+    it passes along the page's links to the residual of the pages it
+    links to. After a small edit the residual sits around the edited
+    pages, so each round touches few links. Once a round would touch
+    more than 1/32 of the links, whole sweeps are cheaper, and every
+    page's residual is pushed at once. Stops once the residual's L1 norm
+    is below `tolerance`. `monitor`, if given, is called before every
+    round with the round number, that norm and the seconds elapsed.
+    """
+    ranks = np.array(ranks, dtype=float)
+    residual = np.array(residual, dtype=float)
+    threshold = tolerance / transitions.n
+    sweep = len(transitions.targets) // 32
+    began = time.perf_counter()
+    for round_number in range(1, max_rounds + 1):
+        size = np.abs(residual)
+        norm = size.sum()
+        if monitor is not None:
+            monitor(round_number, norm, time.perf_counter() - began)
+        if norm < tolerance:
+            break
+        active = np.flatnonzero(size > threshold)
+        # A push costs several times more per link than a sweep does
+        if transitions.out_degree[active].sum() > sweep:
+            ranks += residual
+            residual = damping_factor * transitions.follow(residual)
+            continue
+        amounts = residual[active]
+        ranks[active] += amounts
+        residual[active] = 0
+        transitions.push(residual, active, damping_factor * amounts)
+    return ranks
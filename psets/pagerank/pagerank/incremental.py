@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+
+from crawler import crawl_graph
+from engine import (
+    TOLERANCE, Transitions, edit_residual, power_iteration, push_iteration
+)
+from linkgraph import LinkGraph
+
+FILENAME = "pagerank.ranks.npz"
+
+
+def rank_directory(directory, damping_factor, workers=1,
+                   tolerance=TOLERANCE, method="jacobi", extrapolation=None,
+                   monitor=None):
+    """
+    Crawl `directory` and return (graph, ranks) for it, warm-starting from
+    the ranks saved by the previous call, which are then replaced.
+    `method`, `extrapolation` and `monitor` are passed on to
+    power_iteration, and `monitor` to push_iteration.
+
+    When the same pages are crawled again, only the residual of the pages
+    whose links changed is pushed through the graph. When pages were
+    added or removed, every page's teleport share changes, so the saved
+    ranks only seed a full power iteration.
+    """
+    graph = crawl_graph(directory, workers)
+    transitions = Transitions(graph)
+    path = os.path.join(directory, FILENAME)
+    previous = load_ranks(path, damping_factor)
+
+    if previous is None:
+        ranks = power_iteration(
+            transitions, damping_factor, tolerance=tolerance, method=method,
+            extrapolation=extrapolation, monitor=monitor
+        )
+    elif previous[0].pages == graph.pages:
+        old_graph, old_ranks = previous
+        old = Transitions(old_graph)
+        changed = changed_pages(old, transitions)
+        residual = edit_residual(
+            old, transitions, changed, old_ranks, damping_factor
+        )
+        ranks = push_iteration(
+            transitions, damping_factor, old_ranks, residual, tolerance,
+            monitor=monitor
+        )
+    else:
+        old_graph, old_ranks = previous
+        start = np.full(len(graph), (1 - damping_factor) / len(graph))
+        for i, page in enumerate(graph.pages):
+            if page in old_graph.index:
+                start[i] = old_ranks[old_graph.index[page]]
+        # Steps keep a start's excess mass, shrinking it only by the
+        # damping factor each sweep, so begin from a distribution
+        start /= start.sum()
+        ranks = power_iteration(
+            transitions, damping_factor, start, tolerance, method=method,
+            extrapolation=extrapolation, monitor=monitor
+        )
+
+    try:
+        save_ranks(path, graph, ranks, damping_factor)
+    except OSError:
+        pass
+    return graph, ranks
+
+
+def changed_pages(old, new):
+    """
+    Return the sorted indices of the pages whose links differ between
+    Transitions `old` and `new`, over the same pages.
+    """
+    if np.array_equal(old.offsets, new.offsets):
+        differs = np.flatnonzero(old.targets != new.targets)
+        return np.unique(np.searchsorted(new.offsets, differs, "right") - 1)
+
+    changed = old.out_degree != new.out_degree
+    same = np.flatnonzero(~changed)
+    # Links are sorted within each page, so rows compare element-wise
+    differs = (old.targets[old.link_positions(same)]
+               != new.targets[new.link_positions(same)])
+    owners = np.repeat(same, new.out_degree[same])
+    changed[owners[differs]] = True
+    return np.flatnonzero(changed)
+
+
+def load_ranks(path, damping_factor):
+    """
+    Return the (LinkGraph, ranks) saved at `path`, or None if there are
+    none or they were computed with another damping factor.
+    """
+    try:
+        with np.load(path) as saved:
+            if saved["damping_factor"] != damping_factor:
+                return None
+            graph = LinkGraph(
+                saved["pages"].tolist(), saved["offsets"], saved["links"]
+            )
+            return graph, saved["ranks"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_ranks(path, graph, ranks, damping_factor):
+    """
+    Save `ranks` for LinkGraph `graph` to `path`, along with the graph
+    itself so the next run can tell which pages changed.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        np.savez(
+            f,
+            damping_factor=damping_factor,
+            pages=np.array(graph.pages, dtype=str),
+            offsets=np.frombuffer(graph.offsets, dtype=np.int64),
+            links=np.frombuffer(graph.links, dtype=np.int32),
+            ranks=ranks
+        )
+    os.replace(temporary, path)
@@ -0,0 +1,58 @@
+from array import array
+
+
+class LinkGraph():
+
+    def __init__(self, pages, offsets, links):
+        """
+        Create a link graph over interned pages.
+
+        `pages` holds the page names, and the pages linked to by page `i`
+        are links[offsets[i]:offsets[i + 1]], as indices into `pages`.
+        """
+        self.pages = pages
+        self.index = {page: i for i, page in enumerate(pages)}
+        self.offsets = offsets
+        self.links = links
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Intern a corpus dict, as returned by `crawl`, into a link graph.
+        Links to pages outside the corpus are dropped.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        offsets = array("q", [0])
+        links = array("i")
+        for page in pages:
+            links.extend(sorted(
+                index[link] for link in corpus[page] if link in index
+            ))
+            offsets.append(len(links))
+        return cls(pages, offsets, links)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def links_of(self, page):
+        """
+        Return the indices of the pages linked to by page index `page`.
+        """
+        return self.links[self.offsets[page]:self.offsets[page + 1]]
+
+    def corpus(self):
+        """
+        Return the graph as a corpus dict of page -> set of linked pages.
+        """
+        pages = self.pages
+        return {
+            page: set(pages[link] for link in self.links_of(i))
+            for i, page in enumerate(pages)
+        }
+
+    def ranks(self, vector):
+        """
+        Return a dict mapping each page to its entry in `vector`.
+        """
+        return {page: float(rank) for page, rank in zip(self.pages, vector)}
@@ -1,51 +1,115 @@
-import os
-import random
-import re
 import sys
-from collections import deque
+
+from crawler import crawl_graph
+from edgelist import edge_pagerank, load_edges
+from engine import EXTRAPOLATIONS, METHODS, Transitions, power_iteration
+from incremental import rank_directory
+from linkgraph import LinkGraph
+from sampling import WALKERS, Surfer, estimate, sample_walkers
+
 DAMPING = 0.85
 SAMPLES = 10000
+USAGE = ("Usage: python pagerank.py [--workers N] [--seed S] "
+         "[--incremental] [--method jacobi|gauss-seidel] "
+         "[--extrapolate aitken|quadratic] [--trace] corpus\n"
+         "       python pagerank.py --edges [--trace] edges")
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
-    print(f"PageRank Results from Iteration")
+    args = sys.argv[1:]
+    incremental = pop_flag(args, "--incremental")
+    trace = pop_flag(args, "--trace")
+    monitor = report_sweep if trace else None
+    if pop_flag(args, "--edges"):
+        if len(args) != 1:
+            sys.exit(USAGE)
+        try:
+            ranks = iterate_edges(args[0], DAMPING, monitor)
+        except (OSError, ValueError) as e:
+            sys.exit(str(e))
+        print(f"PageRank Results from Iteration over Edge List")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        return
+    workers = pop_option(args, "--workers")
+    seed = pop_option(args, "--seed")
+    method = pop_option(args, "--method", str) or "jacobi"
+    extrapolation = pop_option(args, "--extrapolate", str)
+    if len(args) != 1 or (workers is not None and workers < 1):
+        sys.exit(USAGE)
+    if method not in METHODS or extrapolation not in EXTRAPOLATIONS:
+        sys.exit(USAGE)
+    corpus = crawl(args[0], workers or 1)
+    if workers is None and seed is None:
+        ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+        print(f"PageRank Results from Sampling (n = {SAMPLES})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+    else:
+        ranks, margins = sample_pagerank_parallel(
+            corpus, DAMPING, SAMPLES, seed, workers or 1
+        )
+        print(f"PageRank Results from Sampling (n = {SAMPLES}, "
+              f"{WALKERS} walkers, 95% confidence)")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f} ± {margins[page]:.4f}")
+    if incremental:
+        graph, vector = rank_directory(
+            args[0], DAMPING, workers or 1, method=method,
+            extrapolation=extrapolation, monitor=monitor
+        )
+        ranks = graph.ranks(vector)
+        print(f"PageRank Results from Iteration (incremental)")
+    else:
+        ranks = iterate_pagerank(
+            corpus, DAMPING, method, extrapolation, monitor
+        )
+        print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def pop_flag(args, flag):
     """
-    Parse a directory of HTML pages and check for links to other pages.
+    Remove `flag` from `args` and return whether it was given.
+    """
+    if flag not in args:
+        return False
+    args.remove(flag)
+    return True
+
+
+def pop_option(args, flag, convert=int):
+    """
+    Remove `flag` and the value after it from `args` and return that
+    value passed through `convert`, or None if `flag` is not given.
+    """
+    if flag not in args:
+        return None
+    i = args.index(flag)
+    try:
+        value = convert(args[i + 1])
+    except (IndexError, ValueError):
+        sys.exit(USAGE)
+    del args[i:i + 2]
+    return value
+
+
+def report_sweep(sweep, change, seconds):
+    """
+    Print the progress of power iteration after sweep number `sweep`.
+    """
+    print(f"  sweep {sweep}: change {change:.2e}, {seconds:.4f}s")
+
+
+def crawl(directory, workers=1):
+    """
+    Parse a directory of HTML pages and check for links to other pages,
+    on a pool of `workers` processes when there is more than one.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
     """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages    
-        )
-
-    return pages
+    return crawl_graph(directory, workers).corpus()
 
 
 def transition_model(corpus, page, damping_factor):
@@ -94,34 +158,29 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    prbFirst = (1 - damping_factor)/len(corpus.keys())
-    # insert equal probability for first page
-    samePrb = {}
-    for key in range(len(corpus.keys())):
-        samePrb[key] = prbFirst
-    data = {}
-    nextPage = random.choices(list(corpus.keys()),  list(samePrb.values()), k = 1)[0]
-    # print(f"first nextPage is: {nextPage}")
-    # print(f"transition_model : {transition_model(corpus, nextPage, damping_factor)}")
-    data[nextPage] = 1
-
-    for i in range(n -1):
-        # print(f"in loop list(corpus[nextPage]): {list(corpus[nextPage])} \n in loop list(transition_model) : {list(transition_model(corpus, nextPage, damping_factor).values())}")
-        nextPage = random.choices(list(corpus.keys()), list(transition_model(corpus, nextPage, damping_factor).values()), k = 1)[0]
-        # print(f"next page in loop: {nextPage}")
-        try:
-            data[nextPage] += 1
-        except KeyError:
-            data[nextPage] = 1
+    graph = LinkGraph.from_corpus(corpus)
+    counts = Surfer(graph, damping_factor).walk(n)
+    return graph.ranks(counts / counts.sum())
 
-    #   calculating the probabilty for each page by dividing their number counts by sample size
-    for page, count in data.items():
-        data[page] = count/n 
-    
-    return data
+
+def sample_pagerank_parallel(corpus, damping_factor, n, seed=None,
+                             workers=1):
+    """
+    Return PageRank estimates for each page from `n` samples split
+    across independent random walkers, run on `workers` processes.
+
+    Returns two dictionaries keyed by page: the estimated PageRank
+    values, and the margin of a 95% confidence interval around each.
+    Results are the same for the same `seed`, whatever `workers` is.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    counts = sample_walkers(graph, damping_factor, n, seed, workers=workers)
+    ranks, margins = estimate(counts)
+    return graph.ranks(ranks), graph.ranks(margins)
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, method="jacobi",
+                     extrapolation=None, monitor=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -129,72 +188,30 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `method`, `extrapolation` and `monitor` are passed on to
+    power_iteration.
     """
-    PR = {}
-    N = len(corpus.keys())
-    # initialzing the probablities
-    for webPage in corpus.keys():
-        #             [previous, latest]
-        # PR[webPage] = [0, 1/len(corpus)]
-        PR[webPage] = deque([0, 1/len(corpus)], 2)
-    
-    possibleVisits = PR.keys()
-    # print(f"values in dict: {list(PR.values())}")
-    # print(f"possibleVisits : {list(possibleVisits)}")
-    
-    weights = []
-    for val in PR.values():
-        weights.append(val[1])
-    # print(f"weights : {weights}")
-    counter = 0
-    # minDifference = 1
-    minDifference = []
-    # while max(minDifference) > 0.001:
-    maxDifference = 1
-    while maxDifference > 0.0001: 
-        Mindifference = 2
-        minDifference = []
-        for page in PR.keys():
-            # print(f"page : {page}")
-            pagesLinkedByPage = []
-            for web in PR.keys():
-                # print(f"corpus[{web}] : {corpus[web]}")
-                if page in corpus[web] and page != web:
-                    pagesLinkedByPage.append(web)
-                
-            # print(f"{page} linked by {pagesLinkedByPage}")
-            
-            sum = 0
-            for link in pagesLinkedByPage:
-                sum += PR[link][1]/len(corpus[link])
-            
-            newPR = (1 - damping_factor)/len(corpus) + (damping_factor * sum)
-            # print(f"newPR: {newPR}")
-            PR[page].append(newPR)
-            difference = abs(PR[page][1] - PR[page][0] )
-            # if abs(PR[page][1] - PR[page][0]) < difference:
-            #     print(f"difference changed for page: {page}")
-            # print(f"minDIfference before condition : {minDifference}")
-            # if difference < minDifference and PR[page][1] != PR[page][0] :
-            #     minDifference = difference
-                # print(f"new difference is {difference}")
-                
-            minDifference.append(difference)
-        
-            # print(f"minDifference array : {minDifference}")
-            # print(f"PR: {PR}\n")
-            # print(f"difference : {difference}\n\n")
+    graph = LinkGraph.from_corpus(corpus)
+    ranks = power_iteration(
+        Transitions(graph), damping_factor, method=method,
+        extrapolation=extrapolation, monitor=monitor
+    )
+    return graph.ranks(ranks)
 
-        maxDifference = max(minDifference)   
 
-    # print(f"PR at the end:{PR}")
-    data = {}
-    for key , val in PR.items():
-        data[key] = round(val[1],4)
-        # data[key] = val[1]
-    
-    # print(f"returned value: {data}")
-    return data
+def iterate_edges(path, damping_factor, monitor=None):
+    """
+    Return PageRank values for each page of the edge list file at `path`,
+    as written by edgelist.convert, streaming its edges from disk on
+    every sweep instead of loading a corpus.
+
+    Return a dictionary where keys are page names, and values are
+    their PageRank value.
+    """
+    pages, edges = load_edges(path)
+    ranks = edge_pagerank(edges, len(pages), damping_factor, monitor=monitor)
+    return {page: float(rank) for page, rank in zip(pages, ranks)}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+import numpy as np
+
+from engine import Transitions, power_iteration
+from linkgraph import LinkGraph
+
+# Personalization vectors computed together in one batch
+BATCH = 64
+
+
+def personalized_pagerank(corpus, damping_factor, preference):
+    """
+    Return PageRank values for each page of `corpus` for a random surfer
+    who, instead of following a link, jumps to a page chosen according
+    to `preference`: either a dict mapping pages to weights, or a
+    collection of seed pages, which are chosen equally often.
+
+    Return a dictionary where keys are page names, and values are
+    their PageRank value. All PageRank values sum to 1.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    teleport = teleport_vector(graph, preference)
+    ranks = power_iteration(Transitions(graph), damping_factor,
+                            teleport=teleport)
+    return graph.ranks(ranks)
+
+
+def batch_pagerank(graph, damping_factor, preferences, batch=BATCH):
+    """
+    Return an (n, k) matrix whose column `j` holds the PageRank vector
+    over LinkGraph `graph` for `preferences[j]`, given as for
+    `personalized_pagerank`.
+
+    Up to `batch` preferences are computed together: each sweep then
+    multiplies the link matrix by a dense (n, batch) matrix, reading the
+    links once for the whole batch rather than once per vector.
+    """
+    transitions = Transitions(graph)
+    ranks = np.empty((len(graph), len(preferences)))
+    for start in range(0, len(preferences), batch):
+        block = preferences[start:start + batch]
+        teleport = np.column_stack(
+            [teleport_vector(graph, preference) for preference in block]
+        )
+        ranks[:, start:start + len(block)] = power_iteration(
+            transitions, damping_factor, teleport=teleport
+        )
+    return ranks
+
+
+def teleport_vector(graph, preference):
+    """
+    Return the teleport distribution over the pages of LinkGraph `graph`
+    described by `preference`, a dict of page weights or a collection
+    of seed pages.
+
+    Raises ValueError for unknown pages, negative weights, or weights
+    that add up to zero.
+    """
+    if not isinstance(preference, dict):
+        preference = {page: 1 for page in preference}
+    teleport = np.zeros(len(graph))
+    for page, weight in preference.items():
+        if page not in graph.index:
+            raise ValueError(f"Unknown page: {page}")
+        if weight < 0:
+            raise ValueError(f"Negative weight for page: {page}")
+        teleport[graph.index[page]] += weight
+    total = teleport.sum()
+    if total <= 0:
+        raise ValueError("Preference gives no page any weight")
+    return teleport / total
@@ -0,0 +1,149 @@
+import multiprocessing
+import random
+
+import numpy as np
+
+# Most walk pieces simulated side by side
+LANES = 1024
+
+# Fewest steps given to each piece
+PIECE_STEPS = 256
+
+# Independent walks the samples are split across by default
+WALKERS = 16
+
+# Visits are buffered and counted in batches of at least this many
+BATCH = 1 << 18
+
+
+class Surfer():
+
+    def __init__(self, graph, damping_factor):
+        """
+        Prepare a random surfer over LinkGraph `graph`.
+
+        The transition model is a mixture: with probability
+        `damping_factor` follow one of the page's links uniformly,
+        otherwise jump to a page chosen uniformly from the corpus. Pages
+        without links always jump. Since every choice within the mixture
+        is uniform, a step needs only a coin flip and an index, rather
+        than a full distribution or an alias table.
+        """
+        self.n = len(graph)
+        self.damping_factor = damping_factor
+        self.offsets = np.frombuffer(graph.offsets, dtype=np.int64)
+        self.links = np.frombuffer(graph.links, dtype=np.int32)
+        self.degrees = np.diff(self.offsets)
+
+    def walk(self, n, seed=None):
+        """
+        Walk at least `n` steps, starting at a random page, and return an
+        array of how often each page was visited.
+
+        The walk is simulated as up to LANES pieces stepped side by side.
+        Each piece starts at a random page and, once it has taken its
+        share of the `n` steps, stops just before its next jump to a
+        random page. Laid end to end the pieces therefore form a single
+        walk, which runs a few steps past `n` to finish on a jump.
+
+        `seed` seeds the NumPy generator. By default it is drawn from the
+        `random` module, so `random.seed` makes walks repeatable.
+        """
+        if seed is None:
+            seed = random.getrandbits(64)
+        rng = np.random.default_rng(seed)
+        damping = self.damping_factor
+        offsets, links, degrees = self.offsets, self.links, self.degrees
+
+        lanes = max(1, min(LANES, n // PIECE_STEPS))
+        quota = np.full(lanes, n // lanes)
+        quota[:n % lanes] += 1
+        taken = np.zeros(lanes, dtype=np.int64)
+        page = rng.integers(self.n, size=lanes)
+
+        counts = np.zeros(self.n, dtype=np.int64)
+        visits = []
+        buffered = 0
+        while len(page):
+            visits.append(page)
+            buffered += len(page)
+            if buffered >= max(BATCH, self.n):
+                counts += np.bincount(np.concatenate(visits), minlength=self.n)
+                visits = []
+                buffered = 0
+            taken += 1
+
+            r = rng.random(len(page))
+            degree = degrees[page]
+            follow = (r < damping) & (degree > 0)
+            nxt = rng.integers(self.n, size=len(page))
+            # Below `damping`, r / damping is uniform over [0, 1)
+            choice = (r[follow] / damping * degree[follow]).astype(np.int64)
+            nxt[follow] = links[offsets[page[follow]] + choice]
+
+            going = follow | (taken < quota)
+            page, taken, quota = nxt[going], taken[going], quota[going]
+
+        if visits:
+            counts += np.bincount(np.concatenate(visits), minlength=self.n)
+        return counts
+
+
+def sample_walkers(graph, damping_factor, n, seed=None, walkers=WALKERS,
+                   workers=1):
+    """
+    Split `n` steps across `walkers` independent walks over LinkGraph
+    `graph`, run on a pool of `workers` processes when there is more than
+    one, and return an array of each walker's visit counts per page.
+
+    Each walker's generator is spawned from master `seed` by its position,
+    so the counts depend only on `seed` and `walkers`, not on `workers`
+    or how the pool schedules the walks.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    seeds = np.random.SeedSequence(seed).spawn(walkers)
+    tasks = [(n // walkers + (i < n % walkers), seeds[i])
+             for i in range(walkers)]
+
+    surfer = Surfer(graph, damping_factor)
+    if workers == 1:
+        return np.array([surfer.walk(steps, s) for steps, s in tasks])
+
+    # Forked workers share the surfer's arrays instead of copying them
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    with context.Pool(workers, init_worker, (surfer,)) as pool:
+        return np.array(pool.starmap(walk_task, tasks))
+
+
+# The Surfer each pool worker walks, set by init_worker
+worker_surfer = None
+
+
+def init_worker(surfer):
+    global worker_surfer
+    worker_surfer = surfer
+
+
+def walk_task(steps, seed):
+    return worker_surfer.walk(steps, seed)
+
+
+def estimate(counts, z=1.96):
+    """
+    Return (ranks, margins) from an array of per-walker visit counts.
+
+    `ranks` pools every walker's visits. Steps within a walk are
+    correlated, but the walkers are independent, so the spread of their
+    separate estimates gives the standard error: `margins` holds `z`
+    standard errors, 95% confidence by default.
+    """
+    ranks = counts.sum(axis=0) / counts.sum()
+    if len(counts) < 2:
+        return ranks, np.full(len(ranks), np.inf)
+    separate = counts / counts.sum(axis=1, keepdims=True)
+    error = separate.std(axis=0, ddof=1) / np.sqrt(len(counts))
+    return ranks, z * error